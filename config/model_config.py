@@ -1,12 +1,25 @@
 """
 AI Model Configuration
 """
+import functools
 import google.generativeai as genai
 from .settings import settings
 
 # Configure Google AI
 genai.configure(api_key=settings.GOOGLE_API_KEY)
 
+# Structured-output schema for tender details extraction; every field may be null
+TENDER_DETAILS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        field: {"type": "string", "nullable": True}
+        for field in (
+            "tender_id", "project_title", "issuing_authority", "location", "project_value",
+            "emd_amount", "summary", "tender_date", "submission_deadline",
+        )
+    },
+}
+
 
 class ModelConfig:
     """AI Model configurations"""
@@ -17,6 +30,7 @@ class ModelConfig:
         return settings.EMBEDDING_MODEL
     
     @staticmethod
+    @functools.lru_cache(maxsize=4)
     def get_summary_model():
         """Get configured summary generation model"""
         return genai.GenerativeModel(
@@ -28,6 +42,21 @@ class ModelConfig:
         )
     
     @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def get_extraction_model():
+        """Get summary model constrained to emit TENDER_DETAILS_SCHEMA JSON"""
+        return genai.GenerativeModel(
+            settings.SUMMARY_MODEL,
+            generation_config={
+                "temperature": settings.SUMMARY_TEMPERATURE,
+                "top_p": 0.95,
+                "response_mime_type": "application/json",
+                "response_schema": TENDER_DETAILS_SCHEMA,
+            }
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
     def get_qa_model():
         """Get configured Q&A model"""
         return genai.GenerativeModel(
@@ -41,10 +70,16 @@ class ModelConfig:
     @staticmethod
     def get_streaming_model(temperature: float = 0.7):
         """Get model configured for streaming"""
+        return ModelConfig._build_streaming_model(round(temperature * 100))
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _build_streaming_model(temperature_x100: int):
+        """Build the streaming model once per temperature (rounded to 2 decimals)"""
         return genai.GenerativeModel(
             settings.QA_MODEL,
             generation_config={
-                "temperature": temperature,
+                "temperature": temperature_x100 / 100.0,
                 "top_p": 0.95,
             }
         )
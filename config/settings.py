@@ -9,6 +9,7 @@ from pathlib import Path
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
+from typing import Literal, Optional
 import urllib3
 
 # Configure logger
@@ -46,6 +47,9 @@ class Settings(BaseSettings):
     APP_VERSION: str = "2.0.0"
     API_HOST: str = "127.0.0.1"
     API_PORT: int = 8000
+    DEBUG: bool = False
+    LOG_LEVEL: str = "INFO"
+    LOG_TO_STDOUT: bool = True
     
     # Google AI
     GOOGLE_API_KEY: str = ""
@@ -57,27 +61,84 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = ""
     DB_PORT: int = 5432
     
+    # Connection pool (DB_POOL_SIZE=0 derives it from CPU count / API_WORKERS)
+    API_WORKERS: int = 1
+    DB_POOL_SIZE: int = 0
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: int = 10
+    DB_STATEMENT_TIMEOUT_MS: int = 60000
+    DB_POOL_RECYCLE: int = 1800
+    # Raised with SET LOCAL for the chunk COPY, which can outlast DB_STATEMENT_TIMEOUT_MS
+    DB_BULK_STATEMENT_TIMEOUT_MS: int = 600000
+    # psycopg server-side prepare after N executions (0 = always; None disables, e.g. behind PgBouncer < 1.21)
+    DB_PREPARE_THRESHOLD: Optional[int] = 0
+    
     # Processing Parameters
     MAX_CHUNK_SIZE: int = 500
     CHUNK_OVERLAP: int = 50
     HYBRID_SEARCH_ALPHA: float = 0.7
     TOP_K_CHUNKS: int = 5
     MAX_RETRIES: int = 3
+    # Ingestion jobs run in their own thread limiter so they cannot exhaust the request threadpool
+    MAX_CONCURRENT_INGESTIONS: int = 2
     MAX_PARALLEL_WORKERS: int = 5
+    # Downloaded PDFs larger than this spill from memory to a temp file
+    PDF_SPOOL_MAX_MEMORY: int = 8 * 1024 * 1024
+    
+    # HNSW index (pgvector)
+    HNSW_M: int = 24
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 100
+    HNSW_ITERATIVE_SCAN: Literal["off", "relaxed_order", "strict_order"] = "relaxed_order"  # pgvector >= 0.8
+    BINARY_RERANK_CANDIDATES: int = 100
+    
+    # Sparse (term-frequency) vectors are feature-hashed into this many dimensions
+    SPARSE_EMBEDDING_DIM: int = 1 << 20
+    
+    # Semantic query cache
+    QUERY_CACHE_SIMILARITY: float = 0.95
+    QUERY_CACHE_MAX_ENTRIES: int = 1024  # questions per (file, level) bucket
+    QUERY_CACHE_MAX_BUCKETS: int = 128  # (file, level) buckets kept, least recently used evicted
+    
+    # File existence cache used by the query/summary routers
+    FILE_EXISTS_CACHE_TTL: float = 60.0
+    FILE_EXISTS_CACHE_MAX_ENTRIES: int = 4096
+    
+    # Assembled document text reused by repeat summary requests (entries can be ~800KB each)
+    DOCUMENT_TEXT_CACHE_MAX_ENTRIES: int = 32
     
     # Embedding API Limits
     MAX_EMBEDDING_CHARS: int = 10000
     MAX_EMBEDDING_TOKENS: int = 2048
+    EMBED_BATCH_SIZE: int = 100  # texts per embed_content call
+    EMBED_MAX_CONCURRENCY: int = 5  # embed_content calls in flight per batch job
+    EMBEDDING_CACHE_ENABLED: bool = True  # content-hash cache in the embedding_cache table
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1024  # in-process LRU of query embeddings
+    EMBED_RPM: int = 1500  # embed_content requests per minute across the process (0 = unlimited)
+    EMBED_BURST: int = 10
     
     # Model Settings
     EMBEDDING_MODEL: str = "models/text-embedding-004"
     SUMMARY_MODEL: str = "models/gemini-2.5-flash"
     QA_MODEL: str = "models/gemini-2.5-flash"
+    # Prompt budget for document context (approx. 4 chars per token), minus prompt overhead
+    MAX_CONTEXT_TOKENS: int = 200000
+    PROMPT_OVERHEAD_TOKENS: int = 500
+    # Tender details extraction reads the first TENDER_DETAILS_PREVIEW_CHARS, and re-asks once with
+    # TENDER_DETAILS_MAX_CHARS only when key fields are missing
+    TENDER_DETAILS_PREVIEW_CHARS: int = 5000
+    TENDER_DETAILS_MAX_CHARS: int = 25000
+    # Re-ingesting identical document text reuses the stored LLM extraction
+    TENDER_DETAILS_CACHE_ENABLED: bool = True
     
     # Temperature settings
     SUMMARY_TEMPERATURE: float = 0.7
     QA_TEMPERATURE: float = 0.4
     
+    # SSE token frames: model deltas are merged until this many chars or seconds accumulate
+    SSE_COALESCE_CHARS: int = 64
+    SSE_COALESCE_INTERVAL: float = 0.05
+    
     model_config = ConfigDict(
         env_file=".env",
         case_sensitive=True,
@@ -4,11 +4,20 @@ Core Domain Models
 These represent the business entities
 """
 from dataclasses import dataclass
+from enum import IntEnum
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from decimal import Decimal
 
 
+class TenderStatus(IntEnum):
+    """Tender lifecycle status (stored as a smallint)"""
+    OPEN = 1
+    CLOSED = 2
+    AWARDED = 3
+    CANCELLED = 4
+
+
 @dataclass
 class TenderProject:
     """Domain model for Tender Project"""
@@ -17,12 +26,17 @@ class TenderProject:
     tender_number: str = None
     tender_date: Optional[datetime] = None
     submission_deadline: Optional[datetime] = None
-    tender_status: str = "Open"
-    tender_value: Decimal = Decimal("0.00")
+    tender_status: TenderStatus = TenderStatus.OPEN
+    tender_value_cents: int = 0
     created_by: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_by: Optional[str] = None
     updated_at: Optional[datetime] = None
+    
+    @property
+    def tender_value(self) -> Decimal:
+        """Tender value in currency units (for display)"""
+        return Decimal(self.tender_value_cents) / 100
 
 
 @dataclass
@@ -53,7 +67,7 @@ class TenderChunk:
     chunk_text: str = None
     chunk_metadata: Optional[Dict[str, Any]] = None
     dense_embedding: Optional[List[float]] = None
-    sparse_embedding: Optional[Dict[str, int]] = None
+    sparse_embedding: Optional[Dict[int, int]] = None
     bm25_tokens: Optional[List[str]] = None
     created_at: Optional[datetime] = None
 
@@ -23,6 +23,11 @@ class EmbeddingGenerationException(TenderManagementException):
     pass
 
 
+class EmbeddingRequestRejectedException(EmbeddingGenerationException):
+    """Raised when the embedding API rejects a request (auth, invalid argument); retrying cannot help"""
+    pass
+
+
 class DatabaseOperationException(TenderManagementException):
     """Raised when database operation fails"""
     pass
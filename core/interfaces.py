@@ -4,7 +4,7 @@ Core Interfaces (Dependency Inversion)
 Define contracts that outer layers must implement
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, AsyncGenerator 
+from typing import List, Dict, Any, Optional, AsyncGenerator, Iterator 
 from .domain_models import TenderProject, TenderFile, TenderChunk, ChunkSearchResult
 
 class ITenderProjectRepository(ABC):
@@ -63,6 +63,11 @@ class ITenderChunkRepository(ABC):
         """Get all chunks for a file"""
         pass
     
+    @abstractmethod
+    def iter_by_file_id(self, tender_file_id: int, batch_size: int = 200) -> Iterator[TenderChunk]:
+        """Stream chunks for a file"""
+        pass
+    
     @abstractmethod
     def hybrid_search(
         self, 
@@ -85,7 +90,7 @@ class IEmbeddingService(ABC):
         pass
     
     @abstractmethod
-    def generate_sparse_embedding(self, tokens: List[str]) -> Dict[str, int]:
+    def generate_sparse_embedding(self, tokens: List[str]) -> Dict[int, int]:
         """Generate sparse embedding"""
         pass
 
@@ -98,7 +103,7 @@ class IStreamingService(ABC):
         self, 
         tender_file_id: int, 
         explanation_level: str
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """Stream summary generation"""
         pass
     
@@ -108,6 +113,6 @@ class IStreamingService(ABC):
         tender_file_id: int,
         question: str,
         explanation_level: str
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """Stream Q&A response"""
         pass
\ No newline at end of file
@@ -2,16 +2,68 @@
 """
 Database Connection Management with SQLAlchemy
 """
+import os
+import asyncio
 import logging
+import threading
 from contextlib import contextmanager
+import orjson
+from pgvector.psycopg import register_vector
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
 from sqlalchemy.pool import QueuePool
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+def _json_serializer(obj) -> str:
+    """Serialize JSONB values with orjson"""
+    return orjson.dumps(obj).decode()
+
+
+def _configure_session(dbapi_connection, connection_record):
+    """Apply per-session planner/pgvector settings on every new connection"""
+    # Run outside a transaction so the SETs are not rolled back on checkin
+    existing_autocommit = dbapi_connection.autocommit
+    dbapi_connection.autocommit = True
+    # Binary adapters so query vectors bind as typed halfvec parameters
+    register_vector(dbapi_connection)
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"SET hnsw.ef_search = {int(settings.HNSW_EF_SEARCH)}")
+    if settings.HNSW_ITERATIVE_SCAN != "off":
+        cursor.execute(f"SET hnsw.iterative_scan = '{settings.HNSW_ITERATIVE_SCAN}'")
+    cursor.execute("SET max_parallel_workers_per_gather = 4")
+    cursor.close()
+    dbapi_connection.autocommit = existing_autocommit
+
+
+def _current_scope():
+    """Session scope: the running asyncio task if any, otherwise the thread"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return id(task)
+    return threading.get_ident()
+
+
+def _pool_size() -> int:
+    """Per-process pool size, sized so all API workers together fit the CPU budget"""
+    if settings.DB_POOL_SIZE > 0:
+        return settings.DB_POOL_SIZE
+    workers = max(1, settings.API_WORKERS)
+    return max(5, (os.cpu_count() or 1) * 2 // workers)
+
+
+def _database_url() -> str:
+    return (
+        f"postgresql+psycopg://{settings.DB_USER}:{settings.DB_PASSWORD}"
+        f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+    )
+
+
 class DatabaseConnection:
     """Manages database connections and session pooling"""
     
@@ -30,29 +82,45 @@ class DatabaseConnection:
         logger.debug(f"Database: {settings.DB_NAME}")
         logger.debug(f"User: {settings.DB_USER}")
         
-        database_url = (
-            f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}"
-            f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
-        )
+        pool_size = _pool_size()
         
         cls._engine = create_engine(
-            database_url,
+            _database_url(),
             poolclass=QueuePool,
-            pool_size=10,
-            max_overflow=20,
-            pool_timeout=30,
-            pool_recycle=3600,
+            pool_size=pool_size,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            pool_use_lifo=True,
+            connect_args={
+                "prepare_threshold": settings.DB_PREPARE_THRESHOLD,
+                "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+            },
+            json_serializer=_json_serializer,
+            json_deserializer=orjson.loads,
             echo=False  # Set to True for SQL query logging
         )
         
-        cls._session_factory = sessionmaker(
-            bind=cls._engine,
-            autocommit=False,
-            autoflush=False
+        event.listen(cls._engine, "connect", _configure_session)
+        
+        # One Session per task/thread, reused across repository calls in that scope
+        cls._session_factory = scoped_session(
+            sessionmaker(
+                bind=cls._engine,
+                autocommit=False,
+                autoflush=False
+            ),
+            scopefunc=_current_scope
         )
         
+        per_process = pool_size + settings.DB_MAX_OVERFLOW
         logger.info("Database connection pool initialized successfully")
-        logger.debug(f"Pool size: 10, Max overflow: 20")
+        logger.info(
+            f"Pool size: {pool_size}, Max overflow: {settings.DB_MAX_OVERFLOW} "
+            f"(up to {per_process} connections per process, "
+            f"{per_process * max(1, settings.API_WORKERS)} across {settings.API_WORKERS} workers)"
+        )
     
     @classmethod
     def get_session(cls) -> Session:
@@ -61,14 +129,23 @@ class DatabaseConnection:
             logger.error("Database pool not initialized")
             raise RuntimeError("Database pool not initialized. Call initialize_pool() first")
         
-        logger.debug("Creating new database session")
         return cls._session_factory()
     
+    @classmethod
+    def release(cls, scope, session: Session):
+        """Drop a closed session from the registry slot it was created in"""
+        if cls._session_factory is None:
+            return
+        sessions = cls._session_factory.registry.registry
+        if sessions.get(scope) is session:
+            del sessions[scope]
+    
     @classmethod
     def close_all_connections(cls):
         """Close all database connections"""
         if cls._engine:
             logger.info("Closing all database connections")
+            cls._session_factory.remove()
             cls._engine.dispose()
             cls._engine = None
             cls._session_factory = None
@@ -78,7 +155,19 @@ class DatabaseConnection:
 @contextmanager
 def get_db_session():
     """Context manager for database sessions with automatic commit/rollback"""
+    scope = _current_scope()
     session = DatabaseConnection.get_session()
+    # The scoped session is shared within a task/thread; only the outermost
+    # block commits, rolls back, closes it and drops it from the registry
+    depth = session.info.get("depth", 0)
+    session.info["depth"] = depth + 1
+    if depth:
+        try:
+            yield session
+        finally:
+            session.info["depth"] = depth
+        return
+    
     logger.debug(f"Session opened: {id(session)}")
     
     try:
@@ -90,5 +179,10 @@ def get_db_session():
         logger.error(f"Session rolled back due to error: {e}", exc_info=True)
         raise
     finally:
+        session.info["depth"] = 0
         session.close()
+        # Worker threads and tasks never pass through the HTTP middleware; their
+        # registry entries would pile up and could be picked up by a later task
+        # that reuses the same id()
+        DatabaseConnection.release(scope, session)
         logger.debug(f"Session closed: {id(session)}")
\ No newline at end of file
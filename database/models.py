@@ -2,12 +2,15 @@
 """
 SQLAlchemy ORM Models
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Numeric, Text, ForeignKey, Date, ARRAY
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, DateTime, Boolean, Text, LargeBinary, ForeignKey, Date, ARRAY, Computed, FetchedValue, UniqueConstraint, func, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, BIT
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from datetime import datetime
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.orm import relationship, joinedload, deferred
+import orjson
+from psycopg.types.json import Jsonb
+from pgvector.sqlalchemy import VECTOR, HALFVEC, SPARSEVEC
+from config.settings import settings
+from core.domain_models import TenderStatus
 
 Base = declarative_base()
 
@@ -21,15 +24,19 @@ class TenderProject(Base):
     tender_number = Column(String(100))
     tender_date = Column(Date)
     submission_deadline = Column(DateTime(timezone=True))
-    tender_status = Column(String(50), default='Open')
-    tender_value = Column(Numeric(18, 2), default=0.00)
+    # TenderStatus value; converted at the repository boundary
+    tender_status = Column(SmallInteger, nullable=False, default=int(TenderStatus.OPEN), server_default=text("1"))
+    tender_value_cents = Column(BigInteger, default=0)
     created_by = Column(Text)
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_by = Column(Text)
-    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())
     
     # Relationships
-    files = relationship("TenderFile", back_populates="project", cascade="all, delete-orphan")
+    files = relationship(
+        "TenderFile", back_populates="project", cascade="all, delete-orphan",
+        lazy="raise", passive_deletes=True
+    )
 
 
 class TenderFile(Base):
@@ -44,31 +51,130 @@ class TenderFile(Base):
     version = Column(Integer, default=1)
     is_active = Column(Boolean, default=True)
     created_by = Column(Text)
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_by = Column(Text)
-    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())
+    
+    # Relationships
+    project = relationship("TenderProject", back_populates="files", lazy="raise")
+    chunks = relationship(
+        "TenderChunk", back_populates="file", cascade="all, delete-orphan",
+        lazy="raise", passive_deletes=True
+    )
+    summary_row = relationship(
+        "TenderFileSummary", back_populates="file", uselist=False,
+        cascade="all, delete-orphan", lazy="raise", passive_deletes=True
+    )
+
+
+class TenderFileSummary(Base):
+    """Large per-file text/JSONB kept out of tender_files so that table stays narrow"""
+    __tablename__ = 'tender_file_summaries'
+    
+    tender_file_id = Column(Integer, ForeignKey('tender_files.tender_file_id', ondelete='CASCADE'), primary_key=True)
     summary = Column(Text)
     simple_summary = Column(Text)
-    bm25_corpus = Column(JSONB)
+    bm25_corpus = deferred(Column(JSONB), raiseload=True)
     
     # Relationships
-    project = relationship("TenderProject", back_populates="files")
-    chunks = relationship("TenderChunk", back_populates="file", cascade="all, delete-orphan")
+    file = relationship("TenderFile", back_populates="summary_row", lazy="raise")
 
 
 class TenderChunk(Base):
     """Tender Chunk Model"""
     __tablename__ = 'tender_chunks'
+    # Hash-partitioned by file so per-document queries touch one small partition;
+    # partitions are created in setup_db.py. The unique (file, chunk_index)
+    # index also serves FK lookups and ordered, index-only chunk listings
+    __table_args__ = (
+        UniqueConstraint('tender_file_id', 'chunk_index', name='uq_chunk_file_idx', postgresql_include=['id']),
+        {'postgresql_partition_by': 'HASH (tender_file_id)'},
+    )
     
+    # Partition key must be part of the primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
-    tender_file_id = Column(Integer, ForeignKey('tender_files.tender_file_id', ondelete='CASCADE'), nullable=False)
+    tender_file_id = Column(Integer, ForeignKey('tender_files.tender_file_id', ondelete='CASCADE'), primary_key=True)
     chunk_index = Column(Integer, nullable=False)
     chunk_text = Column(Text, nullable=False)
     chunk_metadata = Column(JSONB)
-    dense_embedding = Column(Vector(768))
-    sparse_embedding = Column(JSONB)
-    bm25_tokens = Column(ARRAY(Text))
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    # Mirrors tender_files.is_active (kept in sync by triggers in setup_db.py)
+    # so the ANN index can be partial on active chunks
+    is_active = Column(Boolean, nullable=False, default=True, server_default=text("true"))
+    
+    # Heavy columns are deferred: plain ORM loads skip them, and touching
+    # one without undefer() raises instead of issuing a per-row SELECT
+    dense_embedding = deferred(Column(HALFVEC(768)), raiseload=True)
+    bin_embedding = deferred(
+        Column(BIT(768), Computed("binary_quantize(dense_embedding)::bit(768)", persisted=True)),
+        raiseload=True
+    )
+    sparse_embedding = deferred(Column(SPARSEVEC(settings.SPARSE_EMBEDDING_DIM)), raiseload=True)
+    bm25_tokens = deferred(Column(ARRAY(Text)), raiseload=True)
+    chunk_tsv = deferred(
+        Column(TSVECTOR, Computed("to_tsvector('english', chunk_text)", persisted=True)),
+        raiseload=True
+    )
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    file = relationship("TenderFile", back_populates="chunks")
+    file = relationship("TenderFile", back_populates="chunks", lazy="raise")
+    
+    # Column order/types for bulk_copy rows; generated and defaulted columns are filled by Postgres
+    COPY_COLUMNS = (
+        ("tender_file_id", "int4"),
+        ("chunk_index", "int4"),
+        ("chunk_text", "text"),
+        ("chunk_metadata", "jsonb"),
+        ("dense_embedding", "halfvec"),
+        ("sparse_embedding", "sparsevec"),
+        ("bm25_tokens", "text[]"),
+    )
+    
+    @classmethod
+    def bulk_copy(cls, conn, rows) -> int:
+        """Load rows with binary COPY FROM STDIN on a raw psycopg connection (inside its open transaction)"""
+        columns = ", ".join(name for name, _ in cls.COPY_COLUMNS)
+        # jsonb values are encoded with orjson, like the engine's json_serializer
+        json_positions = [i for i, (_, pg_type) in enumerate(cls.COPY_COLUMNS) if pg_type == "jsonb"]
+        count = 0
+        with conn.cursor() as cursor:
+            # Large loads can outlast the per-request statement_timeout; SET LOCAL
+            # reverts when the caller's transaction ends
+            cursor.execute(f"SET LOCAL statement_timeout = {int(settings.DB_BULK_STATEMENT_TIMEOUT_MS)}")
+            with cursor.copy(
+                f"COPY {cls.__tablename__} ({columns}) FROM STDIN WITH (FORMAT BINARY)"
+            ) as copy:
+                copy.set_types([pg_type for _, pg_type in cls.COPY_COLUMNS])
+                for row in rows:
+                    if json_positions:
+                        row = list(row)
+                        for i in json_positions:
+                            if row[i] is not None:
+                                row[i] = Jsonb(row[i], dumps=orjson.dumps)
+                    copy.write_row(row)
+                    count += 1
+        return count
+
+
+class EmbeddingCacheEntry(Base):
+    """Dense embeddings keyed by sha256(model|task_type|text), reused across ingestions and queries"""
+    __tablename__ = 'embedding_cache'
+    
+    cache_key = Column(LargeBinary, primary_key=True)
+    # Full precision: cached vectors are returned to callers as-is
+    embedding = Column(VECTOR(768), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TenderDetailsCacheEntry(Base):
+    """LLM-extracted tender details keyed by sha256(model|prompt_version|document text)"""
+    __tablename__ = 'tender_details_cache'
+    
+    cache_key = Column(LargeBinary, primary_key=True)
+    details = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Relationships use lazy="raise" so hidden N+1 loads fail loudly;
+# queries that need related rows must ask for them with loader options
+FILE_WITH_SUMMARY = (joinedload(TenderFile.summary_row).undefer(TenderFileSummary.bm25_corpus),)
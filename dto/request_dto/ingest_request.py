@@ -2,20 +2,34 @@
 """
 Request DTOs for Document Ingestion
 """
-from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, AfterValidator
+from typing import Annotated, Optional
 from datetime import datetime
 
 
+def _validate_http_url(value: str) -> str:
+    """Cheap scheme check; avoids building a pydantic Url object per request"""
+    if not value.startswith(("http://", "https://")):
+        raise ValueError("URL must start with http:// or https://")
+    return value
+
+
+HttpUrlStr = Annotated[str, AfterValidator(_validate_http_url)]
+
+
+_EXAMPLE_INGEST_REQUEST = {
+    "file_url": "https://example.com/tender-document.pdf",
+    "uploaded_by": "john_doe"
+}
+
+
 class IngestRequest(BaseModel):
     """Request for ingesting a tender document"""
-    file_url: HttpUrl = Field(..., description="URL of the PDF document to ingest")
+    file_url: HttpUrlStr = Field(..., description="URL of the PDF document to ingest")
     uploaded_by: str = Field(default="user", description="User who uploaded the document")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "file_url": "https://example.com/tender-document.pdf",
-                "uploaded_by": "john_doe"
-            }
-        }
\ No newline at end of file
+    model_config = ConfigDict(
+        extra="ignore",
+        frozen=True,
+        json_schema_extra={"example": _EXAMPLE_INGEST_REQUEST}
+    )
\ No newline at end of file
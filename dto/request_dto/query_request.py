@@ -2,10 +2,18 @@
 """
 Request DTOs for Querying Documents
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Literal, Optional, List
 
 
+_EXAMPLE_QUERY_REQUEST = {
+    "question": "What are the eligibility criteria for this tender?",
+    "explanation_level": "professional",
+    "top_k_chunks": 5,
+    "include_sources": True
+}
+
+
 class QueryRequest(BaseModel):
     """Request for Q&A on tender documents"""
     question: str = Field(
@@ -29,14 +37,10 @@ class QueryRequest(BaseModel):
         description="Whether to include source chunk references"
     )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "question": "What are the eligibility criteria for this tender?",
-                "explanation_level": "professional",
-                "top_k_chunks": 5,
-                "include_sources": True
-            }
-        }
+    model_config = ConfigDict(
+        extra="ignore",
+        frozen=True,
+        json_schema_extra={"example": _EXAMPLE_QUERY_REQUEST}
+    )
 
 
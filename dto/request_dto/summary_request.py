@@ -2,10 +2,18 @@
 """
 Request DTOs for Document Summarization
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Literal, Optional, List
 
 
+_EXAMPLE_SUMMARY_REQUEST = {
+    "explanation_level": "simple",
+    "focus_areas": ["eligibility", "deadlines", "requirements"],
+    "max_length": "detailed",
+    "include_key_points": True
+}
+
+
 class SummaryRequest(BaseModel):
     """Request for document summary generation"""
     explanation_level: Literal["simple", "professional"] = Field(
@@ -25,12 +33,8 @@ class SummaryRequest(BaseModel):
         description="Whether to extract key points separately"
     )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "explanation_level": "simple",
-                "focus_areas": ["eligibility", "deadlines", "requirements"],
-                "max_length": "detailed",
-                "include_key_points": True
-            }
-        }
+    model_config = ConfigDict(
+        extra="ignore",
+        frozen=True,
+        json_schema_extra={"example": _EXAMPLE_SUMMARY_REQUEST}
+    )
@@ -2,7 +2,7 @@
 Response DTOs Package
 """
 from .ingest_response import IngestResponse, IngestStatus, DeleteResponse, TenderDetails
-from .query_response import QueryResponse, ChunkReference
+from .query_response import QueryResponse, BatchQueryResponse, ChunkReference
 from .summary_response import SummaryResponse
 
 __all__ = [
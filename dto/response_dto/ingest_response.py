@@ -2,11 +2,24 @@
 """
 Response DTOs for Document Ingestion
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from decimal import Decimal
 
 
+_EXAMPLE_TENDER_DETAILS = {
+    "tender_id": "TENDER-2024-001",
+    "project_title": "Construction of Highway Bridge",
+    "issuing_authority": "National Highways Authority",
+    "location": "Mumbai, Maharashtra",
+    "project_value": "₹50,00,00,000",
+    "emd_amount": "₹50,00,000",
+    "summary": "Construction and maintenance of 2km highway bridge with 4-lane capacity",
+    "boq_document_link": "https://example.com/boq/tender-2024-001.pdf",
+    "deadline": "12 months from date of award"
+}
+
+
 class TenderDetails(BaseModel):
     """Extracted tender details from PDF"""
     tender_id: Optional[str] = Field(None, description="Unique tender identifier from document")
@@ -19,20 +32,17 @@ class TenderDetails(BaseModel):
     boq_document_link: Optional[str] = Field(None, description="Link to separate BOQ document if available")
     deadline: Optional[str] = Field(None, description="Project completion deadline/contract period")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "tender_id": "TENDER-2024-001",
-                "project_title": "Construction of Highway Bridge",
-                "issuing_authority": "National Highways Authority",
-                "location": "Mumbai, Maharashtra",
-                "project_value": "₹50,00,00,000",
-                "emd_amount": "₹50,00,000",
-                "summary": "Construction and maintenance of 2km highway bridge with 4-lane capacity",
-                "boq_document_link": "https://example.com/boq/tender-2024-001.pdf",
-                "deadline": "12 months from date of award"
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra={"example": _EXAMPLE_TENDER_DETAILS}
+    )
+
+
+_EXAMPLE_INGEST_STATUS = {
+    "task_id": "task_abc123",
+    "status": "processing",
+    "message": "Generating embeddings...",
+    "current_step": "embedding_generation"
+}
 
 
 class IngestStatus(BaseModel):
@@ -42,15 +52,27 @@ class IngestStatus(BaseModel):
     message: str = Field(..., description="Human-readable status message")
     current_step: Optional[str] = Field(None, description="Current processing step")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "task_id": "task_abc123",
-                "status": "processing",
-                "message": "Generating embeddings...",
-                "current_step": "embedding_generation"
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra={"example": _EXAMPLE_INGEST_STATUS}
+    )
+
+
+_EXAMPLE_INGEST_RESPONSE = {
+    "tender_file_id": 123,
+    "status": "success",
+    "message": "Document ingested successfully",
+    "tender_details": {
+        "tender_id": "TENDER-2024-001",
+        "project_title": "Construction of Highway Bridge",
+        "issuing_authority": "National Highways Authority",
+        "location": "Mumbai, Maharashtra",
+        "project_value": "₹50,00,00,000",
+        "emd_amount": "₹50,00,000",
+        "summary": "Construction and maintenance of 2km highway bridge",
+        "boq_document_link": "https://example.com/boq/tender-2024-001.pdf",
+        "deadline": "12 months from date of award"
+    }
+}
 
 
 class IngestResponse(BaseModel):
@@ -63,25 +85,21 @@ class IngestResponse(BaseModel):
     # Extracted Tender Details
     tender_details: Optional[TenderDetails] = Field(None, description="Extracted tender information from PDF")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "tender_file_id": 123,
-                "status": "success",
-                "message": "Document ingested successfully",
-                "tender_details": {
-                    "tender_id": "TENDER-2024-001",
-                    "project_title": "Construction of Highway Bridge",
-                    "issuing_authority": "National Highways Authority",
-                    "location": "Mumbai, Maharashtra",
-                    "project_value": "₹50,00,00,000",
-                    "emd_amount": "₹50,00,000",
-                    "summary": "Construction and maintenance of 2km highway bridge",
-                    "boq_document_link": "https://example.com/boq/tender-2024-001.pdf",
-                    "deadline": "12 months from date of award"
-                }
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra={"example": _EXAMPLE_INGEST_RESPONSE}
+    )
+
+
+_EXAMPLE_DELETE_RESPONSE = {
+    "success": True,
+    "tender_file_id": 123,
+    "deleted_counts": {
+        "tender_chunks": 38,
+        "tender_files": 1,
+        "tender_projects": 1
+    },
+    "message": "Tender and all related data deleted successfully"
+}
 
 
 class DeleteResponse(BaseModel):
@@ -91,16 +109,6 @@ class DeleteResponse(BaseModel):
     deleted_counts: dict = Field(..., description="Count of deleted records per table")
     message: str = Field(..., description="Deletion status message")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": True,
-                "tender_file_id": 123,
-                "deleted_counts": {
-                    "tender_chunks": 38,
-                    "tender_files": 1,
-                    "tender_projects": 1
-                },
-                "message": "Tender and all related data deleted successfully"
-            }
-        }
\ No newline at end of file
+    model_config = ConfigDict(
+        json_schema_extra={"example": _EXAMPLE_DELETE_RESPONSE}
+    )
\ No newline at end of file
@@ -2,11 +2,19 @@
 """
 Response DTOs for Query Operations
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime
 
 
+_EXAMPLE_CHUNK_REFERENCE = {
+    "chunk_id": 501,
+    "chunk_index": 3,
+    "relevance_score": 0.89,
+    "preview": "Eligibility criteria: Applicants must be registered contractors with at least 5 years..."
+}
+
+
 class ChunkReference(BaseModel):
     """Reference to a document chunk used in response"""
     chunk_id: int = Field(..., description="Database ID of chunk")
@@ -14,15 +22,24 @@ class ChunkReference(BaseModel):
     relevance_score: float = Field(..., ge=0.0, le=1.0, description="Relevance score")
     preview: str = Field(..., max_length=200, description="Short preview of chunk content")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "chunk_id": 501,
-                "chunk_index": 3,
-                "relevance_score": 0.89,
-                "preview": "Eligibility criteria: Applicants must be registered contractors with at least 5 years..."
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra={"example": _EXAMPLE_CHUNK_REFERENCE}
+    )
+
+
+_EXAMPLE_QUERY_RESPONSE = {
+    "success": True,
+    "answer": "The eligibility criteria require contractors to be registered with...",
+    "chunks_used": 3,
+    "source_chunks": [],
+    "confidence_score": 0.87,
+    "top_relevance": 0.92,
+    "question": "What are the eligibility criteria?",
+    "explanation_level": "professional",
+    "response_time": 2.3,
+    "generated_at": "2024-01-15T14:35:00Z",
+    "related_sections": ["submission requirements", "document checklist"]
+}
 
 
 class QueryResponse(BaseModel):
@@ -67,22 +84,20 @@ class QueryResponse(BaseModel):
     error: Optional[str] = Field(None, description="Error message if query failed")
     warnings: List[str] = Field(default_factory=list, description="Non-critical warnings")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": True,
-                "answer": "The eligibility criteria require contractors to be registered with...",
-                "chunks_used": 3,
-                "source_chunks": [],
-                "confidence_score": 0.87,
-                "top_relevance": 0.92,
-                "question": "What are the eligibility criteria?",
-                "explanation_level": "professional",
-                "response_time": 2.3,
-                "generated_at": "2024-01-15T14:35:00Z",
-                "related_sections": ["submission requirements", "document checklist"]
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra={"example": _EXAMPLE_QUERY_RESPONSE}
+    )
+
+
+_EXAMPLE_BATCH_QUERY_RESPONSE = {
+    "success": True,
+    "total_questions": 3,
+    "successful_answers": 3,
+    "results": [],
+    "total_processing_time": 8.5,
+    "average_response_time": 2.83,
+    "errors": []
+}
 
 
 class BatchQueryResponse(BaseModel):
@@ -113,15 +128,6 @@ class BatchQueryResponse(BaseModel):
         description="Errors encountered during processing"
     )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": True,
-                "total_questions": 3,
-                "successful_answers": 3,
-                "results": [],
-                "total_processing_time": 8.5,
-                "average_response_time": 2.83,
-                "errors": []
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra={"example": _EXAMPLE_BATCH_QUERY_RESPONSE}
+    )
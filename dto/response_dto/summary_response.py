@@ -2,11 +2,36 @@
 """
 Response DTOs for Summary Operations
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime
 
 
+_EXAMPLE_SUMMARY_RESPONSE = {
+    "success": True,
+    "summary": "This tender is for construction services requiring...",
+    "key_points": [
+        "Total estimated value: $500,000",
+        "Submission deadline: February 15, 2024",
+        "Minimum experience: 5 years"
+    ],
+    "sections_covered": [
+        "Project Overview",
+        "Eligibility",
+        "Timeline",
+        "Requirements"
+    ],
+    "total_chunks": 38,
+    "chunks_processed": 38,
+    "explanation_level": "professional",
+    "word_count": 450,
+    "processing_time": 5.7,
+    "generated_at": "2024-01-15T14:40:00Z",
+    "tender_file_id": 123,
+    "document_title": "Construction Tender 2024"
+}
+
+
 class SummaryResponse(BaseModel):
     """Response for document summary"""
     success: bool = Field(..., description="Whether summary generation was successful")
@@ -40,29 +65,6 @@ class SummaryResponse(BaseModel):
     error: Optional[str] = Field(None, description="Error message if summary failed")
     warnings: List[str] = Field(default_factory=list, description="Non-critical warnings")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": True,
-                "summary": "This tender is for construction services requiring...",
-                "key_points": [
-                    "Total estimated value: $500,000",
-                    "Submission deadline: February 15, 2024",
-                    "Minimum experience: 5 years"
-                ],
-                "sections_covered": [
-                    "Project Overview",
-                    "Eligibility",
-                    "Timeline",
-                    "Requirements"
-                ],
-                "total_chunks": 38,
-                "chunks_processed": 38,
-                "explanation_level": "professional",
-                "word_count": 450,
-                "processing_time": 5.7,
-                "generated_at": "2024-01-15T14:40:00Z",
-                "tender_file_id": 123,
-                "document_title": "Construction Tender 2024"
-            }
-        }
\ No newline at end of file
+    model_config = ConfigDict(
+        json_schema_extra={"example": _EXAMPLE_SUMMARY_RESPONSE}
+    )
\ No newline at end of file
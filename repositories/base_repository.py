@@ -11,7 +11,10 @@ ModelType = TypeVar("ModelType", bound=Base)
 
 
 class BaseRepository(Generic[ModelType]):
-    """Base repository with common CRUD operations"""
+    """
+    Base repository with common CRUD operations. Repositories hold no session
+    or request state, so each module exposes one shared instance
+    """
     
     def __init__(self, model: Type[ModelType]):
         self.model = model
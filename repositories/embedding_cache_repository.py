@@ -0,0 +1,53 @@
+# repositories/embedding_cache_repository.py
+"""
+Embedding Cache Repository with SQLAlchemy
+"""
+import logging
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from repositories.base_repository import BaseRepository
+from database.models import EmbeddingCacheEntry
+from database.connection import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCacheRepository(BaseRepository[EmbeddingCacheEntry]):
+    """Repository for cached dense embeddings"""
+    
+    def __init__(self):
+        super().__init__(EmbeddingCacheEntry)
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """Fetch cached embeddings for the given keys; missing keys are absent from the result"""
+        if not keys:
+            return {}
+        
+        with get_db_session() as db:
+            rows = db.execute(
+                select(EmbeddingCacheEntry.cache_key, EmbeddingCacheEntry.embedding)
+                .where(EmbeddingCacheEntry.cache_key.in_(set(keys)))
+            ).all()
+        
+        logger.debug(f"Embedding cache: {len(rows)}/{len(keys)} hits")
+        return {bytes(key): np.asarray(embedding, dtype=np.float32).tolist() for key, embedding in rows}
+    
+    def put_many(self, entries: Dict[bytes, List[float]]) -> None:
+        """Store embeddings; keys already cached are left untouched"""
+        if not entries:
+            return
+        
+        with get_db_session() as db:
+            db.execute(
+                insert(EmbeddingCacheEntry).on_conflict_do_nothing(
+                    index_elements=[EmbeddingCacheEntry.cache_key]
+                ),
+                [{"cache_key": key, "embedding": embedding} for key, embedding in entries.items()]
+            )
+        
+        logger.debug(f"Embedding cache: stored {len(entries)} embeddings")
+
+
+embedding_cache_repository = EmbeddingCacheRepository()
@@ -3,75 +3,165 @@
 TenderChunk Repository with SQLAlchemy
 """
 import logging
-from typing import List
+from contextlib import nullcontext
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from pgvector import HalfVector, SparseVector
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import select, text
 from repositories.base_repository import BaseRepository
 from database.models import TenderChunk
 from core.interfaces import ITenderChunkRepository
 from core.domain_models import TenderChunk as DomainTenderChunk, ChunkSearchResult
 from database.connection import get_db_session
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+# Hybrid search query: dense candidates come from the binary HNSW index
+# reranked by cosine, lexical candidates from the chunk_tsv GIN index, both
+# restricted to active chunks; only their union is scored, so cost tracks
+# matches rather than the number of chunks in the file
+_HYBRID_SEARCH_SQL = text("""
+    WITH bin_candidates AS (
+        SELECT 
+            id,
+            dense_embedding
+        FROM tender_chunks
+        WHERE tender_file_id = :file_id AND is_active
+        ORDER BY bin_embedding <~> binary_quantize(:embedding)
+        LIMIT :bin_k
+    ),
+    dense_scores AS (
+        SELECT 
+            id,
+            1 - (dense_embedding <=> :embedding) AS dense_score
+        FROM bin_candidates
+        ORDER BY dense_embedding <=> :embedding
+        LIMIT :candidate_k
+    ),
+    q AS (
+        SELECT to_tsquery('english', :query_text) AS query
+    ),
+    candidates AS (
+        SELECT id FROM dense_scores
+        UNION
+        SELECT tc.id
+        FROM tender_chunks tc, q
+        WHERE tc.tender_file_id = :file_id AND tc.is_active AND tc.chunk_tsv @@ q.query
+    )
+    SELECT 
+        tc.id,
+        tc.chunk_text,
+        tc.chunk_metadata,
+        tc.chunk_index,
+        (COALESCE(ds.dense_score, 0) * :alpha + 
+         ts_rank(tc.chunk_tsv, q.query) * :beta) AS combined_score
+    FROM candidates c
+    JOIN tender_chunks tc ON tc.id = c.id AND tc.tender_file_id = :file_id
+    CROSS JOIN q
+    LEFT JOIN dense_scores ds ON tc.id = ds.id
+    ORDER BY combined_score DESC
+    LIMIT :top_k;
+""")
+
+
 class TenderChunkRepository(BaseRepository[TenderChunk], ITenderChunkRepository):
     """Repository for TenderChunk operations"""
     
     def __init__(self):
         super().__init__(TenderChunk)
-        logger.debug("TenderChunkRepository initialized")
     
-    def bulk_create(self, chunks: List[DomainTenderChunk]) -> bool:
-        """Create multiple chunks efficiently"""
+    def bulk_create(self, chunks: List[DomainTenderChunk], db: Optional[Session] = None) -> bool:
+        """Create multiple chunks efficiently (inside the caller's transaction when given a session)"""
         if not chunks:
             logger.warning("No chunks to create")
             return True
         
         logger.info(f"Bulk creating {len(chunks)} chunks")
         
-        with get_db_session() as db:
-            db_chunks = []
-            for chunk in chunks:
-                db_chunk = TenderChunk(
-                    tender_file_id=chunk.tender_file_id,
-                    chunk_index=chunk.chunk_index,
-                    chunk_text=chunk.chunk_text,
-                    chunk_metadata=chunk.chunk_metadata,
-                    dense_embedding=chunk.dense_embedding,
-                    sparse_embedding=chunk.sparse_embedding,
-                    bm25_tokens=chunk.bm25_tokens
-                )
-                db_chunks.append(db_chunk)
-            
-            db.bulk_save_objects(db_chunks)
-            db.flush()
-            logger.info(f"Successfully created {len(db_chunks)} chunks")
-            return True
+        rows = [
+            (
+                chunk.tender_file_id,
+                chunk.chunk_index,
+                chunk.chunk_text,
+                chunk.chunk_metadata,
+                HalfVector(np.asarray(chunk.dense_embedding, dtype=np.float16))
+                if chunk.dense_embedding is not None else None,
+                SparseVector(chunk.sparse_embedding, settings.SPARSE_EMBEDDING_DIM)
+                if chunk.sparse_embedding else None,
+                chunk.bm25_tokens
+            )
+            for chunk in chunks
+        ]
+        
+        # Binary COPY on the session's own connection, so the chunks commit
+        # or roll back together with the caller's other writes
+        with (nullcontext(db) if db is not None else get_db_session()) as db:
+            count = TenderChunk.bulk_copy(db.connection().connection.driver_connection, rows)
+        
+        logger.info(f"Successfully created {count} chunks")
+        return True
     
     def get_all_by_file_id(self, tender_file_id: int) -> List[DomainTenderChunk]:
         """Get all chunks for a file"""
-        logger.debug(f"Fetching all chunks for tender_file_id={tender_file_id}")
+        return list(self.iter_by_file_id(tender_file_id))
+    
+    def iter_by_file_id(self, tender_file_id: int, batch_size: int = 200) -> Iterator[DomainTenderChunk]:
+        """Stream a file's chunks in index order, batch_size rows at a time"""
+        logger.debug(f"Streaming chunks for tender_file_id={tender_file_id}")
+        
+        # Plain column tuples: no ORM instances, identity map or embedding columns.
+        # The session stays open until the generator is exhausted or closed
+        stmt = select(
+            TenderChunk.id,
+            TenderChunk.tender_file_id,
+            TenderChunk.chunk_index,
+            TenderChunk.chunk_text,
+            TenderChunk.chunk_metadata,
+            TenderChunk.bm25_tokens,
+            TenderChunk.created_at
+        ).where(
+            TenderChunk.tender_file_id == tender_file_id
+        ).order_by(TenderChunk.chunk_index).execution_options(yield_per=batch_size)
         
         with get_db_session() as db:
-            chunks = db.query(TenderChunk).filter(
-                TenderChunk.tender_file_id == tender_file_id
-            ).order_by(TenderChunk.chunk_index).all()
-            
-            logger.debug(f"Found {len(chunks)} chunks")
-            
-            return [
-                DomainTenderChunk(
-                    id=chunk.id,
-                    tender_file_id=chunk.tender_file_id,
-                    chunk_index=chunk.chunk_index,
-                    chunk_text=chunk.chunk_text,
-                    chunk_metadata=chunk.chunk_metadata,
-                    bm25_tokens=chunk.bm25_tokens,
-                    created_at=chunk.created_at
-                )
-                for chunk in chunks
-            ]
+            for row in db.execute(stmt):
+                yield DomainTenderChunk(**row._mapping)
+    
+    def _search_params(
+        self,
+        db: Session,
+        query_embedding: List[float],
+        query_tokens: List[str],
+        top_k: int,
+        alpha: float
+    ) -> Dict[str, Any]:
+        """Encode the query once and size the candidate stages for a search"""
+        # Stage 1 pulls bin_k candidates by Hamming distance from the binary
+        # HNSW index, stage 2 reranks them by exact cosine and keeps candidate_k
+        candidate_k = top_k * 4
+        bin_k = max(settings.BINARY_RERANK_CANDIDATES, candidate_k)
+        
+        # HNSW returns at most ef_search rows; sessions default to
+        # HNSW_EF_SEARCH, only widen it for this transaction when needed
+        if bin_k > settings.HNSW_EF_SEARCH:
+            db.execute(text(f"SET LOCAL hnsw.ef_search = {int(bin_k)}"))
+            logger.debug(f"hnsw.ef_search set to {bin_k}")
+        
+        return {
+            # Bound as a binary halfvec parameter (adapter registered on connect)
+            'embedding': HalfVector(np.asarray(query_embedding, dtype=np.float16)),
+            # Query tokens are already normalized; OR them so any term can make
+            # a chunk a lexical candidate (BM25 semantics), ts_rank orders them
+            'query_text': ' | '.join(token for token in query_tokens if token.isalnum()),
+            'alpha': alpha,
+            'beta': 1 - alpha,
+            'top_k': top_k,
+            'candidate_k': candidate_k,
+            'bin_k': bin_k
+        }
     
     def hybrid_search(
         self, 
@@ -83,57 +173,14 @@ class TenderChunkRepository(BaseRepository[TenderChunk], ITenderChunkRepository)
     ) -> List[ChunkSearchResult]:
         """Perform hybrid search (dense + BM25)"""
         logger.info(f"Performing hybrid search: tender_file_id={tender_file_id}, top_k={top_k}, alpha={alpha}")
-        logger.debug(f"Query embedding dimensions: {len(query_embedding)}")
-        logger.debug(f"Query tokens: {len(query_tokens)} tokens")
+        logger.debug("Query embedding dimensions: %d, query tokens: %d", len(query_embedding), len(query_tokens))
         
         with get_db_session() as db:
-            query_text = ' '.join(query_tokens)
-            beta = 1 - alpha
-            
-            embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
+            params = self._search_params(db, query_embedding, query_tokens, top_k, alpha)
+            params['file_id'] = tender_file_id
             
             logger.debug("Executing hybrid search SQL query...")
-            
-            # Hybrid search query
-            sql = text("""
-                WITH dense_scores AS (
-                    SELECT 
-                        id,
-                        1 - (dense_embedding <=> CAST(:embedding AS vector)) AS dense_score
-                    FROM tender_chunks
-                    WHERE tender_file_id = :file_id
-                ),
-                bm25_scores AS (
-                    SELECT 
-                        id,
-                        ts_rank(to_tsvector('english', chunk_text), 
-                               plainto_tsquery('english', :query_text)) AS bm25_score
-                    FROM tender_chunks
-                    WHERE tender_file_id = :file_id
-                )
-                SELECT 
-                    tc.id,
-                    tc.chunk_text,
-                    tc.chunk_metadata,
-                    tc.chunk_index,
-                    (COALESCE(ds.dense_score, 0) * :alpha + 
-                     COALESCE(bs.bm25_score, 0) * :beta) AS combined_score
-                FROM tender_chunks tc
-                LEFT JOIN dense_scores ds ON tc.id = ds.id
-                LEFT JOIN bm25_scores bs ON tc.id = bs.id
-                WHERE tc.tender_file_id = :file_id
-                ORDER BY combined_score DESC
-                LIMIT :top_k;
-            """)
-            
-            results = db.execute(sql, {
-                'embedding': embedding_str,
-                'file_id': tender_file_id,
-                'query_text': query_text,
-                'alpha': alpha,
-                'beta': beta,
-                'top_k': top_k
-            }).fetchall()
+            results = db.execute(_HYBRID_SEARCH_SQL, params).fetchall()
             
             logger.info(f"Hybrid search returned {len(results)} results")
             
@@ -152,6 +199,12 @@ class TenderChunkRepository(BaseRepository[TenderChunk], ITenderChunkRepository)
                     rank=rank
                 )
                 search_results.append(result)
-                logger.debug(f"  Rank {rank}: Score={result.relevance_score:.4f}, Chunk={chunk.chunk_index}")
             
-            return search_results
\ No newline at end of file
+            if logger.isEnabledFor(logging.DEBUG):
+                for result in search_results:
+                    logger.debug("  Rank %d: Score=%.4f, Chunk=%d", result.rank, result.relevance_score, result.chunk.chunk_index)
+            
+            return search_results
+
+
+tender_chunk_repository = TenderChunkRepository()
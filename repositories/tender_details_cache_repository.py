@@ -0,0 +1,44 @@
+# repositories/tender_details_cache_repository.py
+"""
+Tender Details Cache Repository with SQLAlchemy
+"""
+import logging
+from typing import Any, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from repositories.base_repository import BaseRepository
+from database.models import TenderDetailsCacheEntry
+from database.connection import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+class TenderDetailsCacheRepository(BaseRepository[TenderDetailsCacheEntry]):
+    """Repository for cached LLM tender details extractions"""
+    
+    def __init__(self):
+        super().__init__(TenderDetailsCacheEntry)
+    
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Cached extraction for key, or None"""
+        with get_db_session() as db:
+            details = db.execute(
+                select(TenderDetailsCacheEntry.details).where(TenderDetailsCacheEntry.cache_key == key)
+            ).scalar_one_or_none()
+        
+        logger.debug(f"Tender details cache: {'hit' if details is not None else 'miss'}")
+        return details
+    
+    def put(self, key: bytes, details: Dict[str, Any]) -> None:
+        """Store an extraction; an existing entry for key is left untouched"""
+        with get_db_session() as db:
+            db.execute(
+                insert(TenderDetailsCacheEntry)
+                .values(cache_key=key, details=details)
+                .on_conflict_do_nothing(index_elements=[TenderDetailsCacheEntry.cache_key])
+            )
+        
+        logger.debug("Tender details cache: stored extraction")
+
+
+tender_details_cache_repository = TenderDetailsCacheRepository()
@@ -2,32 +2,40 @@
 """
 TenderFile Repository with SQLAlchemy
 """
+import time
 import logging
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
 from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, literal, Text, exists as sql_exists
+from sqlalchemy.dialects.postgresql import insert
 from repositories.base_repository import BaseRepository
-from database.models import TenderFile
+from database.models import TenderFile, TenderFileSummary, FILE_WITH_SUMMARY
 from core.interfaces import ITenderFileRepository
 from core.domain_models import TenderFile as DomainTenderFile
 from database.connection import get_db_session
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
 class TenderFileRepository(BaseRepository[TenderFile], ITenderFileRepository):
-    """Repository for TenderFile operations"""
+    """Repository for TenderFile operations (methods join a caller's session when given one)"""
     
     def __init__(self):
         super().__init__(TenderFile)
-        logger.debug("TenderFileRepository initialized")
+        # tender_file_id -> (checked_at, exists), LRU ordered
+        self._exists_cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self._exists_lock = threading.Lock()
     
-    def create(self, file: DomainTenderFile) -> int:
+    def create(self, file: DomainTenderFile, db: Optional[Session] = None) -> int:
         """Create a new tender file"""
         logger.info(f"Creating tender file: {file.file_name}")
         logger.debug(f"Tender ID: {file.tender_id}, File path: {file.file_path}")
         
-        with get_db_session() as db:
+        with (nullcontext(db) if db is not None else get_db_session()) as db:
             new_file = TenderFile(
                 tender_id=file.tender_id,
                 file_name=file.file_name,
@@ -36,7 +44,11 @@ class TenderFileRepository(BaseRepository[TenderFile], ITenderFileRepository):
                 version=file.version,
                 is_active=file.is_active,
                 created_by=file.created_by,
-                bm25_corpus=file.bm25_corpus
+                summary_row=TenderFileSummary(
+                    summary=file.summary,
+                    simple_summary=file.simple_summary,
+                    bm25_corpus=file.bm25_corpus
+                )
             )
             db.add(new_file)
             db.flush()
@@ -45,12 +57,12 @@ class TenderFileRepository(BaseRepository[TenderFile], ITenderFileRepository):
             logger.info(f"Created tender file with ID: {new_file.tender_file_id}")
             return new_file.tender_file_id
     
-    def get_by_id(self, tender_file_id: int) -> Optional[DomainTenderFile]:
+    def get_by_id(self, tender_file_id: int, db: Optional[Session] = None) -> Optional[DomainTenderFile]:
         """Get file by ID"""
         logger.debug(f"Fetching tender file: tender_file_id={tender_file_id}")
         
-        with get_db_session() as db:
-            file = db.query(TenderFile).filter(
+        with (nullcontext(db) if db is not None else get_db_session()) as db:
+            file = db.query(TenderFile).options(*FILE_WITH_SUMMARY).filter(
                 TenderFile.tender_file_id == tender_file_id
             ).first()
             
@@ -60,6 +72,7 @@ class TenderFileRepository(BaseRepository[TenderFile], ITenderFileRepository):
             
             logger.debug(f"Found tender file: {file.file_name}")
             
+            summary_row = file.summary_row
             return DomainTenderFile(
                 tender_file_id=file.tender_file_id,
                 tender_id=file.tender_id,
@@ -72,39 +85,75 @@ class TenderFileRepository(BaseRepository[TenderFile], ITenderFileRepository):
                 created_at=file.created_at,
                 updated_by=file.updated_by,
                 updated_at=file.updated_at,
-                summary=file.summary,
-                simple_summary=file.simple_summary,
-                bm25_corpus=file.bm25_corpus
+                summary=summary_row.summary if summary_row else None,
+                simple_summary=summary_row.simple_summary if summary_row else None,
+                bm25_corpus=summary_row.bm25_corpus if summary_row else None
             )
     
-    def update_summary(self, tender_file_id: int, summary: str, simple_summary: str) -> bool:
+    def update_summary(self, tender_file_id: int, summary: str, simple_summary: str, db: Optional[Session] = None) -> bool:
         """Update file summaries"""
         logger.info(f"Updating summaries for tender_file_id={tender_file_id}")
         logger.debug(f"Summary length: {len(summary)}, Simple summary length: {len(simple_summary)}")
         
-        with get_db_session() as db:
-            file = db.query(TenderFile).filter(
-                TenderFile.tender_file_id == tender_file_id
-            ).first()
+        with (nullcontext(db) if db is not None else get_db_session()) as db:
+            # Single round trip: the INSERT ... SELECT yields no row when the
+            # file does not exist, otherwise it upserts the summary row
+            stmt = insert(TenderFileSummary).from_select(
+                ["tender_file_id", "summary", "simple_summary"],
+                select(
+                    TenderFile.tender_file_id,
+                    literal(summary, Text),
+                    literal(simple_summary, Text)
+                ).where(TenderFile.tender_file_id == tender_file_id)
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[TenderFileSummary.tender_file_id],
+                set_={"summary": stmt.excluded.summary, "simple_summary": stmt.excluded.simple_summary}
+            )
             
-            if file:
-                file.summary = summary
-                file.simple_summary = simple_summary
-                db.flush()
-                logger.info("Summaries updated successfully")
-                return True
+            if db.execute(stmt).rowcount == 0:
+                logger.warning(f"File not found for summary update: tender_file_id={tender_file_id}")
+                return False
             
-            logger.warning(f"File not found for summary update: tender_file_id={tender_file_id}")
-            return False
+            logger.info("Summaries updated successfully")
+            return True
     
-    def exists(self, tender_file_id: int) -> bool:
+    def exists(self, tender_file_id: int, db: Optional[Session] = None) -> bool:
         """Check if file exists"""
         logger.debug(f"Checking if tender file exists: tender_file_id={tender_file_id}")
         
-        with get_db_session() as db:
-            exists = db.query(TenderFile).filter(
-                TenderFile.tender_file_id == tender_file_id
-            ).first() is not None
+        with (nullcontext(db) if db is not None else get_db_session()) as db:
+            exists = db.execute(
+                select(sql_exists().where(TenderFile.tender_file_id == tender_file_id))
+            ).scalar()
             
             logger.debug(f"Tender file exists: {exists}")
-            return exists
\ No newline at end of file
+            return exists
+
+    
+    def exists_cached(self, tender_file_id: int) -> bool:
+        """exists() with a per-process TTL/LRU cache of positive and negative results"""
+        now = time.monotonic()
+        with self._exists_lock:
+            entry = self._exists_cache.get(tender_file_id)
+            if entry is not None and now - entry[0] < settings.FILE_EXISTS_CACHE_TTL:
+                self._exists_cache.move_to_end(tender_file_id)
+                return entry[1]
+        
+        exists = self.exists(tender_file_id)
+        
+        with self._exists_lock:
+            self._exists_cache[tender_file_id] = (now, exists)
+            self._exists_cache.move_to_end(tender_file_id)
+            while len(self._exists_cache) > settings.FILE_EXISTS_CACHE_MAX_ENTRIES:
+                self._exists_cache.popitem(last=False)
+        return exists
+    
+    def invalidate_exists(self, tender_file_id: int) -> None:
+        """Drop the cached existence result for a file (after ingest/delete)"""
+        with self._exists_lock:
+            self._exists_cache.pop(tender_file_id, None)
+
+
+# Shared instance: holds no session or request state, only the exists() cache
+tender_file_repository = TenderFileRepository()
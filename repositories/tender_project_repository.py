@@ -3,109 +3,107 @@
 TenderProject Repository with SQLAlchemy
 """
 import logging
+from contextlib import nullcontext
 from typing import Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from repositories.base_repository import BaseRepository
 from database.models import TenderProject
 from core.interfaces import ITenderProjectRepository
-from core.domain_models import TenderProject as DomainTenderProject
+from core.domain_models import TenderProject as DomainTenderProject, TenderStatus
 from database.connection import get_db_session
 
 logger = logging.getLogger(__name__)
 
 
 class TenderProjectRepository(BaseRepository[TenderProject], ITenderProjectRepository):
-    """Repository for TenderProject operations"""
+    """Repository for TenderProject operations (methods join a caller's session when given one)"""
     
     def __init__(self):
         super().__init__(TenderProject)
-        logger.debug("TenderProjectRepository initialized")
     
-    def create(self, project: DomainTenderProject) -> int:
+    def create(self, project: DomainTenderProject, db: Optional[Session] = None) -> int:
         """Create a new tender project"""
-        logger.info(f"Creating tender project: {project.tender_number}")
-        logger.debug(f"Project ID: {project.project_id}, Status: {project.tender_status}")
+        logger.info("Creating tender project: %s", project.tender_number)
+        logger.debug("Project ID: %s, Status: %s", project.project_id, project.tender_status)
         
-        with get_db_session() as db:
-            # Check if project exists
-            existing = db.query(TenderProject).filter(
-                TenderProject.project_id == project.project_id
-            ).first()
+        with (nullcontext(db) if db is not None else get_db_session()) as db:
+            # One round trip, no check-then-insert race: insert the project or
+            # refresh the tender details of the existing one for project_id
+            stmt = insert(TenderProject).values(
+                project_id=project.project_id,
+                tender_number=project.tender_number,
+                tender_date=project.tender_date,
+                submission_deadline=project.submission_deadline,
+                tender_status=int(project.tender_status),
+                tender_value_cents=project.tender_value_cents,
+                created_by=project.created_by
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[TenderProject.project_id],
+                set_={
+                    "tender_number": stmt.excluded.tender_number,
+                    "tender_date": stmt.excluded.tender_date,
+                    "submission_deadline": stmt.excluded.submission_deadline,
+                    "tender_status": stmt.excluded.tender_status,
+                    "tender_value_cents": stmt.excluded.tender_value_cents
+                }
+            ).returning(TenderProject.tender_id)
             
-            if existing:
-                logger.info(f"Project already exists with tender_id={existing.tender_id}, updating...")
-                existing.tender_number = project.tender_number
-                existing.tender_date = project.tender_date
-                existing.submission_deadline = project.submission_deadline
-                existing.tender_status = project.tender_status
-                existing.tender_value = project.tender_value
-                db.flush()
-                logger.info(f"Updated existing project: tender_id={existing.tender_id}")
-                return existing.tender_id
-            else:
-                logger.debug("Creating new project record...")
-                new_project = TenderProject(
-                    project_id=project.project_id,
-                    tender_number=project.tender_number,
-                    tender_date=project.tender_date,
-                    submission_deadline=project.submission_deadline,
-                    tender_status=project.tender_status,
-                    tender_value=project.tender_value,
-                    created_by=project.created_by
-                )
-                db.add(new_project)
-                db.flush()
-                db.refresh(new_project)
-                logger.info(f"Created new project with tender_id={new_project.tender_id}")
-                return new_project.tender_id
+            tender_id = db.execute(stmt).scalar_one()
+            logger.info("Upserted project: tender_id=%s", tender_id)
+            return tender_id
     
-    def get_by_id(self, tender_id: int) -> Optional[DomainTenderProject]:
+    def get_by_id(self, tender_id: int, db: Optional[Session] = None) -> Optional[DomainTenderProject]:
         """Get project by ID"""
-        logger.debug(f"Fetching tender project: tender_id={tender_id}")
+        logger.debug("Fetching tender project: tender_id=%s", tender_id)
+        
+        # Plain column tuple mapped straight onto the domain model, no ORM instance
+        stmt = select(
+            TenderProject.tender_id,
+            TenderProject.project_id,
+            TenderProject.tender_number,
+            TenderProject.tender_date,
+            TenderProject.submission_deadline,
+            TenderProject.tender_status,
+            TenderProject.tender_value_cents,
+            TenderProject.created_by,
+            TenderProject.created_at,
+            TenderProject.updated_by,
+            TenderProject.updated_at
+        ).where(TenderProject.tender_id == tender_id)
         
-        with get_db_session() as db:
-            project = db.query(TenderProject).filter(
-                TenderProject.tender_id == tender_id
-            ).first()
+        with (nullcontext(db) if db is not None else get_db_session()) as db:
+            row = db.execute(stmt).one_or_none()
             
-            if not project:
-                logger.warning(f"Tender project not found: tender_id={tender_id}")
+            if row is None:
+                logger.warning("Tender project not found: tender_id=%s", tender_id)
                 return None
             
-            logger.debug(f"Found tender project: {project.tender_number}")
-            
-            return DomainTenderProject(
-                tender_id=project.tender_id,
-                project_id=project.project_id,
-                tender_number=project.tender_number,
-                tender_date=project.tender_date,
-                submission_deadline=project.submission_deadline,
-                tender_status=project.tender_status,
-                tender_value=project.tender_value,
-                created_by=project.created_by,
-                created_at=project.created_at,
-                updated_by=project.updated_by,
-                updated_at=project.updated_at
-            )
+            logger.debug("Found tender project: %s", row.tender_number)
+            project = DomainTenderProject(**row._mapping)
+            project.tender_status = TenderStatus(project.tender_status)
+            return project
     
-    def update(self, project: DomainTenderProject) -> bool:
+    def update(self, project: DomainTenderProject, db: Optional[Session] = None) -> bool:
         """Update existing project"""
-        logger.info(f"Updating tender project: tender_id={project.tender_id}")
-        logger.debug(f"Status: {project.tender_status}, Value: {project.tender_value}")
+        logger.info("Updating tender project: tender_id=%s", project.tender_id)
+        logger.debug("Status: %s, Value: %s", project.tender_status, project.tender_value)
         
-        with get_db_session() as db:
-            db_project = db.query(TenderProject).filter(
-                TenderProject.tender_id == project.tender_id
-            ).first()
+        with (nullcontext(db) if db is not None else get_db_session()) as db:
+            db_project = db.get(TenderProject, project.tender_id)
             
             if db_project:
-                db_project.tender_status = project.tender_status
-                db_project.tender_value = project.tender_value
+                db_project.tender_status = int(project.tender_status)
+                db_project.tender_value_cents = project.tender_value_cents
                 db_project.updated_by = project.updated_by
                 db.flush()
                 logger.info("Project updated successfully")
                 return True
             
-            logger.warning(f"Project not found for update: tender_id={project.tender_id}")
-            return False
\ No newline at end of file
+            logger.warning("Project not found for update: tender_id=%s", project.tender_id)
+            return False
+
+
+tender_project_repository = TenderProjectRepository()
@@ -1 +1,7 @@
-"""API Routers package"""
\ No newline at end of file
+"""API Routers package"""
+
+
+def request_banner(title: str) -> str:
+    """Log banner for an incoming request; routers build theirs once and log it at DEBUG"""
+    rule = "=" * 70
+    return f"{rule}\n{title}\n{rule}"
@@ -3,27 +3,45 @@
 Ingestion Router - Handles document upload and processing
 """
 import logging
+from anyio import CapacityLimiter, to_thread
 from fastapi import APIRouter, HTTPException
+from routers import request_banner
 from dto.request_dto import IngestRequest
 from dto.response_dto import IngestResponse, TenderDetails
 from services.ingestion_service import IngestionService
-from repositories.tender_project_repository import TenderProjectRepository
-from repositories.tender_file_repository import TenderFileRepository
-from repositories.tender_chunk_repository import TenderChunkRepository
+from services.retrieval_service import retrieval_service
+from services.query_cache import query_cache
+from repositories.tender_project_repository import tender_project_repository as project_repo
+from repositories.tender_file_repository import tender_file_repository as file_repo
+from repositories.tender_chunk_repository import tender_chunk_repository as chunk_repo
 from core.exceptions import IngestionFailedException
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+_REQUEST_BANNER = request_banner("INGESTION REQUEST RECEIVED")
+
 router = APIRouter(prefix="/ingest", tags=["Ingestion"])
 
 # Initialize dependencies
-project_repo = TenderProjectRepository()
-file_repo = TenderFileRepository()
-chunk_repo = TenderChunkRepository()
 ingestion_service = IngestionService(project_repo, file_repo, chunk_repo)
 
 logger.info("Ingestion router initialized")
 
+# Failure responses are copies of one validated template with the message swapped in
+_FAILED_RESPONSE = IngestResponse(tender_file_id=None, status="failed", message="", tender_details=None)
+
+# Created on first use, inside the running event loop
+_ingest_limiter = None
+
+
+def _get_ingest_limiter() -> CapacityLimiter:
+    """Thread limiter for multi-minute ingestion jobs, separate from the default threadpool"""
+    global _ingest_limiter
+    if _ingest_limiter is None:
+        _ingest_limiter = CapacityLimiter(settings.MAX_CONCURRENT_INGESTIONS)
+    return _ingest_limiter
+
 
 @router.post(
     "",
@@ -31,7 +49,7 @@ logger.info("Ingestion router initialized")
     summary="Ingest New Tender Document",
     description="Process and store a new tender document from URL with automatic tender details extraction"
 )
-def ingest_document(request: IngestRequest):
+async def ingest_document(request: IngestRequest):
     """
     Process a PDF document from URL and extract tender details.
     
@@ -59,20 +77,26 @@ def ingest_document(request: IngestRequest):
     - chunks_created: Number of chunks created
     - processing_time: Time taken to process
     """
-    logger.info("="*70)
-    logger.info("INGESTION REQUEST RECEIVED")
-    logger.info("="*70)
-    logger.info(f"File URL: {request.file_url}")
-    logger.info(f"Uploaded by: {request.uploaded_by}")
+    logger.debug(_REQUEST_BANNER)
+    logger.info("File URL: %s", request.file_url)
+    logger.info("Uploaded by: %s", request.uploaded_by)
     
     try:
-        result = ingestion_service.ingest_document(
-            file_url=str(request.file_url),
-            uploaded_by=request.uploaded_by
+        # Blocking PDF/LLM/embedding pipeline runs off the event loop, so SSE
+        # streams on this worker keep flowing while a document is ingested
+        result = await to_thread.run_sync(
+            ingestion_service.ingest_document,
+            request.file_url,
+            request.uploaded_by,
+            limiter=_get_ingest_limiter()
         )
         
         logger.info("✓ Ingestion completed successfully")
-        logger.info(f"✓ Tender File ID: {result.get('tender_file_id')}")
+        logger.info("✓ Tender File ID: %s", result.get('tender_file_id'))
+        if result.get('tender_file_id') is not None:
+            file_repo.invalidate_exists(result['tender_file_id'])
+            retrieval_service.invalidate_document_text(result['tender_file_id'])
+            query_cache.invalidate(result['tender_file_id'])
         
         # Convert tender_details dict to TenderDetails model
         tender_details_dict = result.get('tender_details', {})
@@ -99,27 +123,11 @@ def ingest_document(request: IngestRequest):
         )
         
     except IngestionFailedException as e:
-        logger.error(f"❌ Ingestion failed: {e}")
-        return IngestResponse(
-            tender_file_id=None,
-            status="failed",
-            message=str(e),
-            progress=None,
-            tender_details=None,
-            chunks_created=None,
-            processing_time=None
-        )
+        logger.error("❌ Ingestion failed: %s", e)
+        return _FAILED_RESPONSE.model_copy(update={"message": str(e)})
     except Exception as e:
-        logger.error(f"❌ Unexpected error during ingestion: {e}", exc_info=True)
-        return IngestResponse(
-            tender_file_id=None,
-            status="failed",
-            message=f"Unexpected error: {str(e)}",
-            progress=None,
-            tender_details=None,
-            chunks_created=None,
-            processing_time=None
-        )
+        logger.error("❌ Unexpected error during ingestion: %s", e, exc_info=True)
+        return _FAILED_RESPONSE.model_copy(update={"message": f"Unexpected error: {str(e)}"})
 
 
 @router.delete(
@@ -127,18 +135,21 @@ def ingest_document(request: IngestRequest):
     summary="Delete Tender Document",
     description="Delete a tender document and all related data"
 )
-def delete_document(tender_file_id: int):
+async def delete_document(tender_file_id: int):
     """Delete tender document and all associated data"""
-    logger.info(f"Delete request received for tender_file_id={tender_file_id}")
+    logger.info("Delete request received for tender_file_id=%s", tender_file_id)
     
     try:
         # Implementation here
-        logger.info(f"Document {tender_file_id} deleted successfully")
+        file_repo.invalidate_exists(tender_file_id)
+        retrieval_service.invalidate_document_text(tender_file_id)
+        query_cache.invalidate(tender_file_id)
+        logger.info("Document %s deleted successfully", tender_file_id)
         return {
             "success": True,
             "tender_file_id": tender_file_id,
             "message": "Document deleted successfully"
         }
     except Exception as e:
-        logger.error(f"Delete failed: {e}", exc_info=True)
+        logger.error("Delete failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -3,30 +3,40 @@
 Query Router with SSE Streaming Support
 """
 import logging
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, Path
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
+from routers import request_banner
 from dto.request_dto import QueryRequest
 from dto.response_dto import QueryResponse
-from services.streaming_service import StreamingService
-from services.retrieval_service import RetrievalService
-from services.embedding_service import EmbeddingService
-from repositories.tender_chunk_repository import TenderChunkRepository
-from repositories.tender_file_repository import TenderFileRepository
+from services.streaming_service import streaming_service, SSE_HEADERS, NOT_FOUND_EVENT
+from repositories.tender_file_repository import tender_file_repository as file_repo
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/document", tags=["Query"])
+_REQUEST_BANNER = request_banner("QUERY REQUEST RECEIVED")
 
-# Initialize dependencies
-chunk_repo = TenderChunkRepository()
-file_repo = TenderFileRepository()
-embedding_service = EmbeddingService()
-retrieval_service = RetrievalService(chunk_repo, embedding_service)
-streaming_service = StreamingService(retrieval_service)
+router = APIRouter(prefix="/document", tags=["Query"])
 
 logger.info("Query router initialized")
 
 
+async def _query_events(tender_file_id: int, request: QueryRequest):
+    """Check the document exists inside the stream, then relay the service's events"""
+    if not await run_in_threadpool(file_repo.exists_cached, tender_file_id):
+        logger.error("Document not found: tender_file_id=%s", tender_file_id)
+        yield NOT_FOUND_EVENT
+        return
+    
+    logger.info("Document found, starting streaming response")
+    async for event in streaming_service.stream_qa_response(
+        tender_file_id=tender_file_id,
+        question=request.question,
+        explanation_level=request.explanation_level
+    ):
+        yield event
+
+
 @router.post(
     "/{tender_file_id}/query",
     summary="Ask a Question (SSE Streaming)",
@@ -39,32 +49,15 @@ async def query_document(
     """
     Stream Q&A response using Server-Sent Events (SSE).
     """
-    logger.info("="*70)
-    logger.info("QUERY REQUEST RECEIVED")
-    logger.info("="*70)
-    logger.info(f"Tender File ID: {tender_file_id}")
-    logger.info(f"Question: {request.question}")
-    logger.info(f"Explanation Level: {request.explanation_level}")
-    logger.info(f"Top K: {request.top_k_chunks}")
-    
-    # Check if document exists
-    if not file_repo.exists(tender_file_id):
-        logger.error(f"Document not found: tender_file_id={tender_file_id}")
-        raise HTTPException(status_code=404, detail="Document not found")
-    
-    logger.info("Document found, starting streaming response")
+    logger.debug(_REQUEST_BANNER)
+    logger.info("Tender File ID: %s", tender_file_id)
+    logger.info("Question: %s", request.question)
+    logger.info("Explanation Level: %s", request.explanation_level)
+    logger.info("Top K: %s", request.top_k_chunks)
     
     # Return SSE stream
     return StreamingResponse(
-        streaming_service.stream_qa_response(
-            tender_file_id=tender_file_id,
-            question=request.question,
-            explanation_level=request.explanation_level
-        ),
+        _query_events(tender_file_id, request),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+        headers=SSE_HEADERS
     )
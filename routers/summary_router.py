@@ -3,30 +3,39 @@
 Summary Router with SSE Streaming Support
 """
 import logging
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, Path
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
+from routers import request_banner
 from dto.request_dto import SummaryRequest
 from dto.response_dto import SummaryResponse
-from services.streaming_service import StreamingService
-from services.retrieval_service import RetrievalService
-from services.embedding_service import EmbeddingService
-from repositories.tender_chunk_repository import TenderChunkRepository
-from repositories.tender_file_repository import TenderFileRepository
+from services.streaming_service import streaming_service, SSE_HEADERS, NOT_FOUND_EVENT
+from repositories.tender_file_repository import tender_file_repository as file_repo
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/document", tags=["Summary"])
+_REQUEST_BANNER = request_banner("SUMMARY REQUEST RECEIVED")
 
-# Initialize dependencies
-chunk_repo = TenderChunkRepository()
-file_repo = TenderFileRepository()
-embedding_service = EmbeddingService()
-retrieval_service = RetrievalService(chunk_repo, embedding_service)
-streaming_service = StreamingService(retrieval_service)
+router = APIRouter(prefix="/document", tags=["Summary"])
 
 logger.info("Summary router initialized")
 
 
+async def _summary_events(tender_file_id: int, request: SummaryRequest):
+    """Check the document exists inside the stream, then relay the service's events"""
+    if not await run_in_threadpool(file_repo.exists_cached, tender_file_id):
+        logger.error("Document not found: tender_file_id=%s", tender_file_id)
+        yield NOT_FOUND_EVENT
+        return
+    
+    logger.info("Document found, starting streaming response")
+    async for event in streaming_service.stream_summary(
+        tender_file_id=tender_file_id,
+        explanation_level=request.explanation_level
+    ):
+        yield event
+
+
 @router.post(
     "/{tender_file_id}/summarize",
     summary="Generate Document Summary (SSE Streaming)",
@@ -39,34 +48,18 @@ async def summarize_document(
     """
     Stream summary generation using Server-Sent Events (SSE).
     """
-    logger.info("="*70)
-    logger.info("SUMMARY REQUEST RECEIVED")
-    logger.info("="*70)
-    logger.info(f"Tender File ID: {tender_file_id}")
-    logger.info(f"Explanation Level: {request.explanation_level}")
-    logger.info(f"Max Length: {request.max_length}")
-    logger.info(f"Include Key Points: {request.include_key_points}")
-    
-    if request.focus_areas:
-        logger.info(f"Focus Areas: {', '.join(request.focus_areas)}")
+    logger.debug(_REQUEST_BANNER)
+    logger.info("Tender File ID: %s", tender_file_id)
+    logger.info("Explanation Level: %s", request.explanation_level)
+    logger.info("Max Length: %s", request.max_length)
+    logger.info("Include Key Points: %s", request.include_key_points)
     
-    # Check if document exists
-    if not file_repo.exists(tender_file_id):
-        logger.error(f"Document not found: tender_file_id={tender_file_id}")
-        raise HTTPException(status_code=404, detail="Document not found")
-    
-    logger.info("Document found, starting streaming response")
+    if request.focus_areas and logger.isEnabledFor(logging.INFO):
+        logger.info("Focus Areas: %s", ', '.join(request.focus_areas))
     
     # Return SSE stream
     return StreamingResponse(
-        streaming_service.stream_summary(
-            tender_file_id=tender_file_id,
-            explanation_level=request.explanation_level
-        ),
+        _summary_events(tender_file_id, request),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+        headers=SSE_HEADERS
     )
\ No newline at end of file
@@ -3,28 +3,117 @@
 Embedding Service for generating embeddings with size limits
 """
 import time
+import random
+import hashlib
 import logging
-from typing import List, Dict
+import functools
+import concurrent.futures
+from typing import List, Dict, Optional, Tuple
 from collections import Counter
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from core.interfaces import IEmbeddingService
 from config.model_config import model_config
 from config.settings import settings
-from core.exceptions import EmbeddingGenerationException
+from core.exceptions import EmbeddingGenerationException, EmbeddingRequestRejectedException
+from repositories.embedding_cache_repository import EmbeddingCacheRepository, embedding_cache_repository
 from utils.text_processing import truncate_for_embedding
+from utils.rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1 << 16)
+def _sparse_index(token: str) -> int:
+    """Feature-hash a token into SPARSE_EMBEDDING_DIM (md5 rather than hash() so indices are stable across processes)"""
+    return int(hashlib.md5(token.encode()).hexdigest()[:8], 16) % settings.SPARSE_EMBEDDING_DIM
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a 429/503 response's Retry-After header, when the error carries one"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_transient(error: Exception) -> bool:
+    """Retry rate limits, timeouts, 5xx and network errors; other 4xx (bad argument, auth) fail fast"""
+    if isinstance(error, google_exceptions.ClientError):
+        # api_core has no class for 408, so match it by status code
+        return error.code == 408 or isinstance(error, (
+            google_exceptions.TooManyRequests,
+            google_exceptions.ResourceExhausted,
+        ))
+    return True
+
+
+def _backoff_seconds(retries: int, error: Exception) -> float:
+    """Server's Retry-After if given, else full-jitter exponential backoff capped at 30s"""
+    # Jitter keeps concurrent slices from retrying in lockstep after a shared 429
+    return _retry_after(error) or random.uniform(0, min(30, 2 ** retries))
+
+
 class EmbeddingService(IEmbeddingService):
     """Service for generating dense and sparse embeddings"""
     
-    def __init__(self):
+    def __init__(self, cache_repository: Optional[EmbeddingCacheRepository] = None):
+        self.cache_repository = cache_repository
+        # Resolved once; also part of every embedding cache key
+        self._embed_model = model_config.get_embedding_model()
+        # Proactive client-side limit so bursts of batches stay under the API quota
+        self._limiter = TokenBucket(settings.EMBED_RPM / 60, settings.EMBED_BURST)
         logger.info("Initializing EmbeddingService")
         logger.debug(f"Embedding model: {settings.EMBEDDING_MODEL}")
         logger.debug(f"Max embedding chars: {settings.MAX_EMBEDDING_CHARS}")
     
+    def _cache_key(self, text: str, task_type: str) -> bytes:
+        """Content hash of (model, task_type, text); the model is part of the key so vectors never mix"""
+        return hashlib.sha256(f"{self._embed_model}|{task_type}|{text}".encode()).digest()
+    
+    def _cache_get(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """Cached embeddings for keys; the cache is best-effort and never fails a request"""
+        if self.cache_repository is None or not settings.EMBEDDING_CACHE_ENABLED:
+            return {}
+        try:
+            return self.cache_repository.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            return {}
+    
+    def _cache_put(self, entries: Dict[bytes, List[float]]):
+        """Store freshly generated embeddings, skipping zero-vector fallbacks"""
+        if self.cache_repository is None or not settings.EMBEDDING_CACHE_ENABLED:
+            return
+        entries = {key: embedding for key, embedding in entries.items() if any(embedding)}
+        try:
+            self.cache_repository.put_many(entries)
+        except Exception as e:
+            logger.warning(f"Embedding cache store failed: {e}")
+    
     def generate_dense_embedding(self, text: str, task_type: str) -> List[float]:
+        """Generate dense embedding, served from the content-hash cache when possible"""
+        key = self._cache_key(text, task_type)
+        cached = self._cache_get([key])
+        if key in cached:
+            logger.debug("Dense embedding served from cache")
+            return cached[key]
+        
+        embedding = self._embed_text(text, task_type)
+        self._cache_put({key: embedding})
+        return embedding
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embedding for a retrieval query; repeated questions are served from an in-process LRU"""
+        # Case/whitespace variants of the same question share one entry
+        return list(self._embed_query_cached(" ".join(query.lower().split())))
+    
+    @functools.lru_cache(maxsize=settings.QUERY_EMBEDDING_CACHE_SIZE)
+    def _embed_query_cached(self, query: str) -> Tuple[float, ...]:
+        return tuple(self.generate_dense_embedding(query, "retrieval_query"))
+    
+    def _embed_text(self, text: str, task_type: str) -> List[float]:
         """Generate dense embedding using Google's embedding model with size limits"""
         
         # Truncate text if too long
@@ -39,8 +128,9 @@ class EmbeddingService(IEmbeddingService):
         retries = 0
         while retries < settings.MAX_RETRIES:
             try:
+                self._limiter.acquire()
                 embedding = genai.embed_content(
-                    model=model_config.get_embedding_model(),
+                    model=self._embed_model,
                     content=text,
                     task_type=task_type
                 )
@@ -58,6 +148,10 @@ class EmbeddingService(IEmbeddingService):
                         raise EmbeddingGenerationException("Text too short after reduction")
                     continue
                 
+                if not _is_transient(e):
+                    logger.error(f"Embedding request rejected: {e}")
+                    raise EmbeddingRequestRejectedException(f"Embedding request rejected: {e}")
+                
                 retries += 1
                 if retries >= settings.MAX_RETRIES:
                     logger.error(f"Failed to generate embedding after {settings.MAX_RETRIES} retries: {e}")
@@ -65,20 +159,101 @@ class EmbeddingService(IEmbeddingService):
                         f"Failed to generate embedding after {settings.MAX_RETRIES} retries: {e}"
                     )
                 
-                wait_time = 2 ** retries
-                logger.warning(f"Embedding attempt {retries} failed, waiting {wait_time}s: {e}")
+                wait_time = _backoff_seconds(retries, e)
+                logger.warning(f"Embedding attempt {retries} failed, waiting {wait_time:.1f}s: {e}")
                 time.sleep(wait_time)
         
         # Fallback zero vector
         logger.error("Returning zero vector as fallback")
         return [0.0] * 768
     
-    def generate_sparse_embedding(self, tokens: List[str]) -> Dict[str, int]:
-        """Generate sparse embedding (term frequency)"""
+    def generate_dense_embeddings_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        """Generate dense embeddings for a batch of texts in a single API call"""
+        if not texts:
+            return []
+        
+        texts = [truncate_for_embedding(text, settings.MAX_EMBEDDING_CHARS) for text in texts]
+        logger.debug(f"Generating dense embeddings for batch of {len(texts)} texts, task_type={task_type}")
+        
+        retries = 0
+        while True:
+            try:
+                self._limiter.acquire()
+                embedding = genai.embed_content(
+                    model=self._embed_model,
+                    content=texts,
+                    task_type=task_type
+                )
+                logger.debug(f"Successfully generated {len(embedding['embedding'])} embeddings in one call")
+                return embedding['embedding']
+                
+            except Exception as e:
+                error_msg = str(e)
+                
+                # If payload too large, split the batch and embed each half
+                if "payload size exceeds" in error_msg.lower() or "too large" in error_msg.lower():
+                    if len(texts) == 1:
+                        return [self._embed_text(texts[0], task_type)]
+                    mid = len(texts) // 2
+                    logger.warning(f"Batch payload too large, splitting {len(texts)} texts into {mid} + {len(texts) - mid}")
+                    return (
+                        self.generate_dense_embeddings_batch(texts[:mid], task_type)
+                        + self.generate_dense_embeddings_batch(texts[mid:], task_type)
+                    )
+                
+                if not _is_transient(e):
+                    logger.error(f"Batch embedding request rejected: {e}")
+                    raise EmbeddingRequestRejectedException(f"Batch embedding request rejected: {e}")
+                
+                retries += 1
+                if retries >= settings.MAX_RETRIES:
+                    logger.error(f"Failed to generate batch embeddings after {settings.MAX_RETRIES} retries: {e}")
+                    raise EmbeddingGenerationException(
+                        f"Failed to generate batch embeddings after {settings.MAX_RETRIES} retries: {e}"
+                    )
+                
+                wait_time = _backoff_seconds(retries, e)
+                logger.warning(f"Batch embedding attempt {retries} failed, waiting {wait_time:.1f}s: {e}")
+                time.sleep(wait_time)
+    
+    def generate_sparse_embedding(self, tokens: List[str]) -> Dict[int, int]:
+        """Generate sparse embedding (term frequency, feature-hashed to SPARSE_EMBEDDING_DIM)"""
         logger.debug(f"Generating sparse embedding for {len(tokens)} tokens")
-        sparse = dict(Counter(tokens))
+        # Token -> index is memoized, so counting is one C-level pass; hash
+        # collisions simply add up in the same bucket
+        sparse = Counter(map(_sparse_index, tokens))
         logger.debug(f"Generated sparse embedding with {len(sparse)} unique terms")
-        return sparse
+        return dict(sparse)
+    
+    def _embed_slice(self, batch: List[str], start: int, task_type: str) -> Tuple[List[List[float]], int]:
+        """
+        Embed one slice in a single call; on transient or retry-exhausted failure
+        fall back to per-text calls for it. Rejected requests are re-raised
+        """
+        # Small jitter so concurrent slices do not hit the API in lockstep
+        time.sleep(random.uniform(0, 0.05))
+        try:
+            embeddings = self.generate_dense_embeddings_batch(batch, task_type)
+            logger.debug(f"Embedded texts {start}-{start + len(batch) - 1}")
+            return embeddings, 0
+        except EmbeddingRequestRejectedException:
+            # Every per-text call would be rejected the same way
+            raise
+        except Exception as e:
+            logger.warning(f"Batch {start}-{start + len(batch) - 1} failed, embedding its texts one by one: {e}")
+        
+        embeddings = []
+        failed_count = 0
+        for i, text in enumerate(batch, start):
+            try:
+                embeddings.append(self._embed_text(text, task_type))
+            except EmbeddingRequestRejectedException:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to generate embedding for chunk {i}: {e}")
+                embeddings.append([0.0] * 768)
+                failed_count += 1
+        return embeddings, failed_count
     
     def batch_generate_dense_embeddings(
         self, 
@@ -87,25 +262,58 @@ class EmbeddingService(IEmbeddingService):
     ) -> List[List[float]]:
         """Generate embeddings for multiple texts with error handling"""
         logger.info(f"Batch generating embeddings for {len(texts)} texts")
-        embeddings = []
-        failed_count = 0
         
-        for i, text in enumerate(texts):
+        # Repeated headers/footers are embedded once and scattered back at the end
+        unique_index: Dict[str, int] = {}
+        index_map = [unique_index.setdefault(text, len(unique_index)) for text in texts]
+        unique_texts = list(unique_index)
+        if len(unique_texts) < len(texts):
+            logger.info(f"Deduplicated {len(texts)} texts to {len(unique_texts)} unique")
+        
+        # Cached texts are filled in directly; only misses go to the API
+        keys = [self._cache_key(text, task_type) for text in unique_texts]
+        cached = self._cache_get(keys)
+        embeddings: List[Optional[List[float]]] = [cached.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if cached:
+            logger.info(f"Embedding cache hits: {len(unique_texts) - len(missing)}/{len(unique_texts)}")
+        
+        # Fully cached (e.g. re-ingesting a known document): no executor, no API calls
+        if not missing:
+            logger.info(f"Batch embedding complete: all {len(unique_texts)} unique texts served from cache")
+            return [embeddings[i] for i in index_map]
+        
+        missing_texts = [unique_texts[i] for i in missing]
+        batch_size = max(1, settings.EMBED_BATCH_SIZE)
+        starts = range(0, len(missing_texts), batch_size)
+        
+        # One embed_content call per EMBED_BATCH_SIZE texts, at most
+        # EMBED_MAX_CONCURRENCY in flight; map() keeps slices in input order
+        generated = []
+        failed_count = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, settings.EMBED_MAX_CONCURRENCY)) as executor:
             try:
-                embedding = self.generate_dense_embedding(text, task_type)
-                embeddings.append(embedding)
-                
-                if i % 10 == 0 and i > 0:
-                    logger.debug(f"Progress: {i}/{len(texts)} embeddings generated")
-                    time.sleep(1)
-                    
-            except Exception as e:
-                logger.error(f"Failed to generate embedding for chunk {i}: {e}")
-                embeddings.append([0.0] * 768)
-                failed_count += 1
+                for slice_embeddings, slice_failed in executor.map(
+                    lambda start: self._embed_slice(missing_texts[start:start + batch_size], start, task_type),
+                    starts
+                ):
+                    generated.extend(slice_embeddings)
+                    failed_count += slice_failed
+            except EmbeddingRequestRejectedException:
+                # Fail the ingestion now instead of sending the remaining slices
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        
+        for i, embedding in zip(missing, generated):
+            embeddings[i] = embedding
+        self._cache_put({keys[i]: embedding for i, embedding in zip(missing, generated)})
         
         if failed_count > 0:
-            logger.warning(f"Failed to generate {failed_count}/{len(texts)} embeddings")
+            logger.warning(f"Failed to generate {failed_count}/{len(unique_texts)} unique embeddings")
         
-        logger.info(f"Batch embedding complete: {len(texts) - failed_count}/{len(texts)} successful")
-        return embeddings
\ No newline at end of file
+        logger.info(f"Batch embedding complete: {len(unique_texts) - failed_count}/{len(unique_texts)} unique texts successful")
+        return [embeddings[i] for i in index_map]
+
+
+# Shared instance: the service holds no per-request state
+embedding_service = EmbeddingService(embedding_cache_repository)
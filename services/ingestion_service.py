@@ -1,7 +1,7 @@
 """
 Ingestion Service - Orchestrates document processing
 """
-import random
+import uuid
 import logging
 import time
 from typing import Dict, Any
@@ -45,8 +45,9 @@ class IngestionService:
         logger.info(f"File URL: {file_url}")
         logger.info(f"Uploaded by: {uploaded_by}")
         
-        # Generate unique project ID
-        project_id = random.randint(10000, 99999)
+        # Generate unique project ID: project creation upserts on project_id, so a
+        # collision would overwrite another tender (31 bits to fit the int4 column)
+        project_id = uuid.uuid4().int & 0x7FFFFFFF
         tender_number = f"AUTO-{project_id}"
         
         logger.debug(f"Generated project_id: {project_id}")
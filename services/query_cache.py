@@ -0,0 +1,113 @@
+# services/query_cache.py
+"""
+Semantic Query Cache - reuses answers for near-duplicate questions
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+import numpy as np
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _CacheBucket:
+    """Matrix of normalized query embeddings, grown on demand up to capacity, with LRU eviction"""
+
+    _INITIAL_ROWS = 8
+
+    def __init__(self, dim: int, capacity: int):
+        self.capacity = capacity
+        self.vectors = np.zeros((min(self._INITIAL_ROWS, capacity), dim), dtype=np.float32)
+        self.payloads: List[Dict[str, Any]] = []
+        self.lru: "OrderedDict[int, None]" = OrderedDict()
+        self.size = 0
+
+    def lookup(self, query: np.ndarray, threshold: float) -> Optional[Dict[str, Any]]:
+        if self.size == 0:
+            return None
+        scores = self.vectors[:self.size] @ query
+        slot = int(np.argmax(scores))
+        if scores[slot] < threshold:
+            return None
+        self.lru.move_to_end(slot)
+        logger.debug(f"Query cache hit: slot={slot}, similarity={scores[slot]:.4f}")
+        return self.payloads[slot]
+
+    def add(self, query: np.ndarray, payload: Dict[str, Any]):
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
+            if slot == len(self.vectors):
+                # Double the matrix (capped at capacity) instead of allocating it all up front
+                grown = np.zeros((min(2 * len(self.vectors), self.capacity), self.vectors.shape[1]), dtype=np.float32)
+                grown[:slot] = self.vectors
+                self.vectors = grown
+            self.payloads.append(payload)
+        else:
+            slot, _ = self.lru.popitem(last=False)
+            self.payloads[slot] = payload
+        self.vectors[slot] = query
+        self.lru[slot] = None
+        self.lru.move_to_end(slot)
+
+
+class SemanticQueryCache:
+    """In-process cache keyed by query embedding similarity, one bucket per key (LRU over keys)"""
+
+    def __init__(self, threshold: float = None, max_entries: int = None, max_buckets: int = None):
+        self.threshold = settings.QUERY_CACHE_SIMILARITY if threshold is None else threshold
+        self.max_entries = settings.QUERY_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_buckets = settings.QUERY_CACHE_MAX_BUCKETS if max_buckets is None else max_buckets
+        self._buckets: "OrderedDict[Hashable, _CacheBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        logger.info(
+            f"SemanticQueryCache initialized (threshold={self.threshold}, "
+            f"max_entries={self.max_entries}, max_buckets={self.max_buckets})"
+        )
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
+
+    def get(self, key: Hashable, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Return cached payload if a stored query is similar enough"""
+        query = self._normalize(embedding)
+        if query is None:
+            return None
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket.vectors.shape[1] != query.shape[0]:
+                return None
+            self._buckets.move_to_end(key)
+            return bucket.lookup(query, self.threshold)
+
+    def put(self, key: Hashable, embedding: List[float], payload: Dict[str, Any]):
+        """Store payload for a query embedding"""
+        query = self._normalize(embedding)
+        if query is None or self.max_entries <= 0 or self.max_buckets <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket.vectors.shape[1] != query.shape[0]:
+                bucket = _CacheBucket(query.shape[0], self.max_entries)
+                self._buckets[key] = bucket
+            self._buckets.move_to_end(key)
+            bucket.add(query, payload)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+
+    def invalidate(self, tender_file_id: int):
+        """Drop all cached answers for a document"""
+        with self._lock:
+            for key in [k for k in self._buckets if k[0] == tender_file_id]:
+                del self._buckets[key]
+
+
+# Shared instance: answers are invalidated by the ingestion router on delete/re-ingest
+query_cache = SemanticQueryCache()
@@ -3,10 +3,12 @@
 Retrieval Service for searching and fetching chunks
 """
 import logging
-from typing import List
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from core.domain_models import TenderChunk, ChunkSearchResult
-from repositories.tender_chunk_repository import TenderChunkRepository
-from services.embedding_service import EmbeddingService
+from repositories.tender_chunk_repository import TenderChunkRepository, tender_chunk_repository
+from services.embedding_service import EmbeddingService, embedding_service
 from config.settings import settings
 from utils.text_processing import preprocess_text
 
@@ -23,6 +25,9 @@ class RetrievalService:
     ):
         self.chunk_repository = chunk_repository
         self.embedding_service = embedding_service
+        # (tender_file_id, max_chars) -> (text, chunk_count); chunks are immutable once ingested
+        self._document_text_cache: "OrderedDict[tuple, Tuple[str, int]]" = OrderedDict()
+        self._document_text_lock = threading.Lock()
         logger.info("RetrievalService initialized")
     
     def get_all_chunks(self, tender_file_id: int) -> List[TenderChunk]:
@@ -32,11 +37,69 @@ class RetrievalService:
         logger.info(f"Retrieved {len(chunks)} chunks for tender_file_id={tender_file_id}")
         return chunks
     
+    def get_document_text(self, tender_file_id: int, max_chars: Optional[int] = None) -> Tuple[str, int]:
+        """Stream a document's chunks into one string, up to max_chars; returns (text, chunk_count)"""
+        parts = []
+        size = 0
+        truncated = False
+        
+        chunks = self.chunk_repository.iter_by_file_id(tender_file_id)
+        try:
+            for chunk in chunks:
+                if max_chars is not None and parts and size + len(chunk.chunk_text) > max_chars:
+                    truncated = True
+                    break
+                parts.append(chunk.chunk_text)
+                size += len(chunk.chunk_text) + 2
+        finally:
+            # Stop the row stream (and release its session) as soon as the budget is hit
+            chunks.close()
+        
+        if truncated:
+            logger.warning(
+                f"Document context truncated to {len(parts)} chunks ({size} chars) "
+                f"for tender_file_id={tender_file_id}"
+            )
+        logger.info(f"Retrieved {len(parts)} chunks for tender_file_id={tender_file_id}")
+        return "\n\n".join(parts), len(parts)
+    
+    def get_document_text_cached(self, tender_file_id: int, max_chars: Optional[int] = None) -> Tuple[str, int]:
+        """get_document_text() with a small per-process LRU, so repeat summaries skip the DB and join"""
+        key = (tender_file_id, max_chars)
+        with self._document_text_lock:
+            entry = self._document_text_cache.get(key)
+            if entry is not None:
+                self._document_text_cache.move_to_end(key)
+                logger.debug(f"Document text served from cache for tender_file_id={tender_file_id}")
+                return entry
+        
+        entry = self.get_document_text(tender_file_id, max_chars)
+        if not entry[1]:
+            return entry
+        
+        with self._document_text_lock:
+            self._document_text_cache[key] = entry
+            self._document_text_cache.move_to_end(key)
+            while len(self._document_text_cache) > settings.DOCUMENT_TEXT_CACHE_MAX_ENTRIES:
+                self._document_text_cache.popitem(last=False)
+        return entry
+    
+    def invalidate_document_text(self, tender_file_id: int) -> None:
+        """Drop cached text for a file (after delete/re-ingest)"""
+        with self._document_text_lock:
+            for key in [key for key in self._document_text_cache if key[0] == tender_file_id]:
+                del self._document_text_cache[key]
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Generate the dense embedding used for retrieval of a query"""
+        return self.embedding_service.embed_query(query)
+    
     def retrieve_relevant_chunks(
         self,
         tender_file_id: int,
         query: str,
-        top_k: int = None
+        top_k: int = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[ChunkSearchResult]:
         """Retrieve most relevant chunks using hybrid search"""
         
@@ -52,15 +115,14 @@ class RetrievalService:
         logger.info(f"Hybrid Alpha: {settings.HYBRID_SEARCH_ALPHA}")
         
         # Generate query embeddings
-        logger.debug("Generating query embeddings...")
-        query_embedding = self.embedding_service.generate_dense_embedding(
-            text=query,
-            task_type="retrieval_query"
-        )
-        logger.debug(f"Generated dense embedding with {len(query_embedding)} dimensions")
+        if query_embedding is None:
+            logger.debug("Generating query embeddings...")
+            query_embedding = self.embed_query(query)
+            logger.debug("Generated dense embedding with %d dimensions", len(query_embedding))
         
         query_tokens = preprocess_text(query)
-        logger.debug(f"Tokenized query into {len(query_tokens)} tokens: {query_tokens[:10]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Tokenized query into %d tokens: %s...", len(query_tokens), query_tokens[:10])
         
         # Perform hybrid search
         logger.info("Performing hybrid search...")
@@ -78,8 +140,13 @@ class RetrievalService:
             logger.info("Top 3 results:")
             for i, result in enumerate(results[:3], 1):
                 logger.info(f"  {i}. Score: {result.relevance_score:.4f}, Chunk: {result.chunk.chunk_index}")
-                logger.debug(f"     Preview: {result.chunk.chunk_text[:100]}...")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("     Preview: %s...", result.chunk.chunk_text[:100])
         
         logger.info("="*70)
         
-        return results
\ No newline at end of file
+        return results
+
+
+# Shared instance used by the query and summary routers
+retrieval_service = RetrievalService(tender_chunk_repository, embedding_service)
@@ -2,31 +2,117 @@
 """
 SSE Streaming Service for Real-time Responses
 """
-import json
 import asyncio
 import logging
-from typing import AsyncGenerator
+import time
+from io import StringIO
+from typing import AsyncGenerator, Optional, Union
+import orjson
 from core.interfaces import IStreamingService
-from services.retrieval_service import RetrievalService
+from services.retrieval_service import RetrievalService, retrieval_service
+from services.query_cache import SemanticQueryCache, query_cache
 from config.model_config import model_config
 from config.settings import settings
 from core.exceptions import DocumentNotFoundException
 
 logger = logging.getLogger(__name__)
 
+# SSE frames are written as bytes; the "event: ...\ndata: " prefix per event
+# type and the frame terminator are encoded once
+_SSE_PREFIXES = {
+    event_type: f"event: {event_type}\ndata: ".encode()
+    for event_type in ("status", "token", "complete", "error")
+}
+_SSE_END = b"\n\n"
+
+
+def sse_event(event_type: str, data: Union[str, bytes]) -> bytes:
+    """Create SSE formatted event (data may be pre-encoded, e.g. orjson output)"""
+    if isinstance(data, str):
+        data = data.encode()
+    return _SSE_PREFIXES[event_type] + data + _SSE_END
+
+
+# Response headers for every SSE stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
+# Sent by the routers in place of a 404: the stream (and its 200 headers)
+# starts before the document lookup
+NOT_FOUND_EVENT = sse_event("error", "Document not found")
+
+# Precomputed section headers for Q&A context
+_SECTION_HDRS = [f"[Section {i+1}]\n" for i in range(64)]
+
+# Static instruction blocks keyed by (agent, explanation_level). The variable
+# part (document, then question) is appended after them, so every prompt of a
+# kind shares a byte-identical prefix the provider's prompt cache can reuse
+_PROMPT_INSTRUCTIONS = {
+    ("summary", "simple"): """
+You are summarizing a tender document for a 14-year-old student.
+Use simple language, short sentences, and explain technical terms.
+
+Provide a clear, simple summary that covers:
+1. What the tender is about
+2. Who can apply
+3. Important deadlines
+4. Key requirements
+
+Keep it friendly and easy to understand.
+
+Document content:
+""",
+    ("summary", "professional"): """
+You are a professional tender analyst. Provide a comprehensive summary.
+
+Provide a structured summary covering:
+1. Tender Overview
+2. Scope of Work
+3. Eligibility Criteria
+4. Submission Requirements
+5. Timeline and Deadlines
+6. Evaluation Criteria
+
+Use professional terminology and be precise.
+
+Document content:
+""",
+    ("qa", "simple"): """
+You are helping a 14-year-old understand a tender document.
+Use simple words and short sentences.
+Provide a clear, simple answer. Explain any technical terms.
+
+Relevant sections from the document:
+""",
+    ("qa", "professional"): """
+You are a professional tender consultant.
+Provide a precise, professional answer based on the document sections.
+
+Relevant sections from the document:
+""",
+}
+
 
 class StreamingService(IStreamingService):
     """Handles SSE streaming for Q&A and Summary generation"""
     
-    def __init__(self, retrieval_service: RetrievalService):
+    def __init__(
+        self,
+        retrieval_service: RetrievalService,
+        query_cache: Optional[SemanticQueryCache] = None
+    ):
         self.retrieval_service = retrieval_service
+        self.query_cache = query_cache or SemanticQueryCache()
         logger.info("StreamingService initialized")
     
     async def stream_summary(
         self, 
         tender_file_id: int, 
         explanation_level: str
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """Stream summary generation with SSE"""
         logger.info("="*70)
         logger.info("STREAMING SUMMARY GENERATION")
@@ -34,30 +120,34 @@ class StreamingService(IStreamingService):
         logger.info(f"Tender File ID: {tender_file_id}")
         logger.info(f"Explanation Level: {explanation_level}")
         
+        # Start loading the document before the first event goes out
+        logger.debug("Fetching all chunks...")
+        # Only as much of the document as fits the model's context budget is read
+        max_chars = (settings.MAX_CONTEXT_TOKENS - settings.PROMPT_OVERHEAD_TOKENS) * 4
+        text_task = asyncio.create_task(asyncio.to_thread(
+            self.retrieval_service.get_document_text_cached, tender_file_id, max_chars
+        ))
+        
         try:
             # Yield initial status
             yield self._create_sse_event("status", "Retrieving document chunks...")
-            await asyncio.sleep(0.1)
             
             # Get all chunks
-            logger.debug("Fetching all chunks...")
-            chunks = self.retrieval_service.get_all_chunks(tender_file_id)
+            combined_text, chunk_count = await text_task
             
-            if not chunks:
+            if not chunk_count:
                 logger.error(f"No chunks found for tender_file_id={tender_file_id}")
                 raise DocumentNotFoundException(f"No chunks found for file {tender_file_id}")
             
-            logger.info(f"Retrieved {len(chunks)} chunks")
-            yield self._create_sse_event("status", f"Processing {len(chunks)} chunks...")
-            await asyncio.sleep(0.1)
+            logger.info(f"Retrieved {chunk_count} chunks")
+            yield self._create_sse_event("status", f"Processing {chunk_count} chunks...")
             
             # Prepare context
             logger.debug("Preparing context for LLM...")
-            context = self._prepare_summary_context(chunks, explanation_level)
+            context = self._prepare_summary_context(combined_text, explanation_level)
             logger.debug(f"Context prepared: {len(context)} characters")
             
             yield self._create_sse_event("status", "Generating summary...")
-            await asyncio.sleep(0.1)
             
             # Get streaming model
             logger.debug(f"Loading model with temperature={settings.SUMMARY_TEMPERATURE}")
@@ -68,17 +158,13 @@ class StreamingService(IStreamingService):
             # Stream the response
             logger.info("Starting LLM streaming...")
             full_response = ""
-            token_count = 0
-            response = model.generate_content(context, stream=True)
+            frame_count = 0
+            async for text in self._stream_coalesced_text(model, context):
+                full_response += text
+                frame_count += 1
+                yield self._create_sse_event("token", text)
             
-            for chunk in response:
-                if chunk.text:
-                    full_response += chunk.text
-                    token_count += 1
-                    yield self._create_sse_event("token", chunk.text)
-                    await asyncio.sleep(0.01)
-            
-            logger.info(f"Streaming complete: {token_count} tokens, {len(full_response)} chars")
+            logger.info(f"Streaming complete: {frame_count} token frames, {len(full_response)} chars")
             
             # Send completion
             yield self._create_sse_event("complete", full_response)
@@ -87,13 +173,16 @@ class StreamingService(IStreamingService):
         except Exception as e:
             logger.error(f"Streaming error: {e}", exc_info=True)
             yield self._create_sse_event("error", str(e))
+        finally:
+            # Client went away before the load finished
+            text_task.cancel()
     
     async def stream_qa_response(
         self, 
         tender_file_id: int,
         question: str,
         explanation_level: str
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """Stream Q&A response with SSE"""
         logger.info("="*70)
         logger.info("STREAMING Q&A RESPONSE")
@@ -102,17 +191,33 @@ class StreamingService(IStreamingService):
         logger.info(f"Question: {question}")
         logger.info(f"Explanation Level: {explanation_level}")
         
+        # Embed the question once for both cache lookup and retrieval; started
+        # before the first event so the API call overlaps the status write
+        embed_task = asyncio.create_task(asyncio.to_thread(self.retrieval_service.embed_query, question))
+        
         try:
             # Yield initial status
             yield self._create_sse_event("status", "Searching relevant sections...")
-            await asyncio.sleep(0.1)
+            
+            query_embedding = await embed_task
+            cache_key = (tender_file_id, explanation_level)
+            cached = self.query_cache.get(cache_key, query_embedding)
+            
+            if cached is not None:
+                logger.info("Serving answer from semantic query cache")
+                yield self._create_sse_event("token", cached["answer"])
+                yield self._create_sse_event("complete", orjson.dumps(cached))
+                logger.info("="*70)
+                return
             
             # Retrieve relevant chunks
             logger.debug("Retrieving relevant chunks...")
-            search_results = self.retrieval_service.retrieve_relevant_chunks(
+            search_results = await asyncio.to_thread(
+                self.retrieval_service.retrieve_relevant_chunks,
                 tender_file_id=tender_file_id,
                 query=question,
-                top_k=settings.TOP_K_CHUNKS
+                top_k=settings.TOP_K_CHUNKS,
+                query_embedding=query_embedding
             )
             
             if not search_results:
@@ -122,7 +227,6 @@ class StreamingService(IStreamingService):
             
             logger.info(f"Found {len(search_results)} relevant chunks")
             yield self._create_sse_event("status", f"Found {len(search_results)} relevant sections...")
-            await asyncio.sleep(0.1)
             
             # Prepare context
             logger.debug("Preparing Q&A context...")
@@ -130,7 +234,6 @@ class StreamingService(IStreamingService):
             logger.debug(f"Context prepared: {len(context)} characters")
             
             yield self._create_sse_event("status", "Generating answer...")
-            await asyncio.sleep(0.1)
             
             # Get streaming model
             logger.debug(f"Loading model with temperature={settings.QA_TEMPERATURE}")
@@ -141,17 +244,13 @@ class StreamingService(IStreamingService):
             # Stream the response
             logger.info("Starting LLM streaming...")
             full_response = ""
-            token_count = 0
-            response = model.generate_content(context, stream=True)
-            
-            for chunk in response:
-                if chunk.text:
-                    full_response += chunk.text
-                    token_count += 1
-                    yield self._create_sse_event("token", chunk.text)
-                    await asyncio.sleep(0.01)
+            frame_count = 0
+            async for text in self._stream_coalesced_text(model, context):
+                full_response += text
+                frame_count += 1
+                yield self._create_sse_event("token", text)
             
-            logger.info(f"Streaming complete: {token_count} tokens, {len(full_response)} chars")
+            logger.info(f"Streaming complete: {frame_count} token frames, {len(full_response)} chars")
             
             # Send completion with metadata
             completion_data = {
@@ -159,89 +258,78 @@ class StreamingService(IStreamingService):
                 "chunks_used": len(search_results),
                 "top_relevance": search_results[0].relevance_score if search_results else 0
             }
-            yield self._create_sse_event("complete", json.dumps(completion_data))
+            self.query_cache.put(cache_key, query_embedding, completion_data)
+            yield self._create_sse_event("complete", orjson.dumps(completion_data))
             logger.info("="*70)
             
         except Exception as e:
             logger.error(f"Streaming error: {e}", exc_info=True)
             yield self._create_sse_event("error", str(e))
+        finally:
+            embed_task.cancel()
     
-    def _create_sse_event(self, event_type: str, data: str) -> str:
+    async def _stream_model_text(self, model, prompt: str) -> AsyncGenerator[str, None]:
+        """Pull the blocking Gemini stream in a worker thread, yielding text as it arrives"""
+        response = await asyncio.to_thread(model.generate_content, prompt, stream=True)
+        iterator = iter(response)
+        
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, None)
+            if chunk is None:
+                break
+            if chunk.text:
+                yield chunk.text
+    
+    async def _stream_coalesced_text(self, model, prompt: str) -> AsyncGenerator[str, None]:
+        """Model text merged into fewer, larger SSE frames (by size, or time since the last frame)"""
+        buffer = []
+        size = 0
+        last_flush = time.monotonic()
+        
+        async for text in self._stream_model_text(model, prompt):
+            buffer.append(text)
+            size += len(text)
+            now = time.monotonic()
+            if size >= settings.SSE_COALESCE_CHARS or now - last_flush >= settings.SSE_COALESCE_INTERVAL:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+                last_flush = now
+        
+        # Remainder goes out before the caller sends "complete"
+        if buffer:
+            yield "".join(buffer)
+    
+    def _create_sse_event(self, event_type: str, data: Union[str, bytes]) -> bytes:
         """Create SSE formatted event"""
-        logger.debug(f"SSE Event: {event_type} ({len(data)} chars)")
-        return f"event: {event_type}\ndata: {data}\n\n"
+        return sse_event(event_type, data)
     
-    def _prepare_summary_context(self, chunks, explanation_level: str) -> str:
+    def _prepare_summary_context(self, combined_text: str, explanation_level: str) -> str:
         """Prepare context for summary generation"""
-        logger.debug(f"Preparing summary context with {len(chunks)} chunks, level={explanation_level}")
-        combined_text = "\n\n".join([chunk.chunk_text for chunk in chunks])
+        logger.debug(f"Preparing summary context from {len(combined_text)} chars, level={explanation_level}")
         
-        if explanation_level == "simple":
-            prompt = f"""
-You are summarizing a tender document for a 14-year-old student.
-Use simple language, short sentences, and explain technical terms.
-
-Document content:
-{combined_text}
-
-Provide a clear, simple summary that covers:
-1. What the tender is about
-2. Who can apply
-3. Important deadlines
-4. Key requirements
-
-Keep it friendly and easy to understand.
-"""
-        else:
-            prompt = f"""
-You are a professional tender analyst. Provide a comprehensive summary.
-
-Document content:
-{combined_text}
-
-Provide a structured summary covering:
-1. Tender Overview
-2. Scope of Work
-3. Eligibility Criteria
-4. Submission Requirements
-5. Timeline and Deadlines
-6. Evaluation Criteria
-
-Use professional terminology and be precise.
-"""
+        level = "simple" if explanation_level == "simple" else "professional"
+        prompt = _PROMPT_INSTRUCTIONS[("summary", level)] + combined_text
         logger.debug(f"Summary prompt prepared: {len(prompt)} characters")
         return prompt
     
     def _prepare_qa_context(self, question: str, search_results, explanation_level: str) -> str:
         """Prepare context for Q&A"""
         logger.debug(f"Preparing Q&A context with {len(search_results)} results, level={explanation_level}")
-        context_chunks = "\n\n".join([
-            f"[Section {i+1}]\n{result.chunk.chunk_text}"
-            for i, result in enumerate(search_results)
-        ])
+        buf = StringIO()
+        for i, result in enumerate(search_results):
+            if i:
+                buf.write("\n\n")
+            buf.write(_SECTION_HDRS[i] if i < len(_SECTION_HDRS) else f"[Section {i+1}]\n")
+            buf.write(result.chunk.chunk_text)
+        context_chunks = buf.getvalue()
         
-        if explanation_level == "simple":
-            prompt = f"""
-You are helping a 14-year-old understand a tender document.
-Use simple words and short sentences.
-
-Relevant sections from the document:
-{context_chunks}
-
-Question: {question}
-
-Provide a clear, simple answer. Explain any technical terms.
-"""
-        else:
-            prompt = f"""
-You are a professional tender consultant.
-
-Relevant sections from the document:
-{context_chunks}
+        level = "simple" if explanation_level == "simple" else "professional"
+        # Question goes last: it is the only part that changes between questions on a document
+        prompt = f"{_PROMPT_INSTRUCTIONS[('qa', level)]}{context_chunks}\n\nQuestion: {question}\n"
+        logger.debug(f"Q&A prompt prepared: {len(prompt)} characters")
+        return prompt
 
-Question: {question}
 
-Provide a precise, professional answer based on the document sections.
-"""
-        logger.debug(f"Q&A prompt prepared: {len(prompt)} characters")
-        return prompt
\ No newline at end of file
+# Shared instance so both routers use one semantic query cache
+streaming_service = StreamingService(retrieval_service, query_cache)
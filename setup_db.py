@@ -1,10 +1,14 @@
 #Setup_db.py
 """
 Database Setup Script - Run from project root
-Usage: python setup_db.py
+Usage: python setup_db.py                      # create missing tables/indexes, migrate an older schema, keep data
+       python setup_db.py --reset              # drop and recreate every table
+       python setup_db.py --bulk-mode start    # drop ANN/GIN indexes before a bulk load
+       python setup_db.py --bulk-mode finish   # cluster chunks by file and rebuild them
 """
 import sys
 import os
+import argparse
 from pathlib import Path
 
 # Ensure we're in the project root
@@ -12,6 +16,24 @@ PROJECT_ROOT = Path(__file__).parent.absolute()
 os.chdir(PROJECT_ROOT)
 sys.path.insert(0, str(PROJECT_ROOT))
 
+# Number of hash partitions for tender_chunks
+CHUNK_PARTITIONS = 64
+
+# Index build resources for bulk rebuilds
+BULK_MAINTENANCE_WORK_MEM = '2GB'
+BULK_PARALLEL_MAINTENANCE_WORKERS = 7
+
+parser = argparse.ArgumentParser(description="Create the database schema")
+parser.add_argument(
+    "--bulk-mode", choices=["start", "finish"],
+    help="start: drop heavy indexes before bulk ingestion; finish: cluster and rebuild them"
+)
+parser.add_argument(
+    "--reset", action="store_true",
+    help="drop all tables first (destroys ingested data)"
+)
+args = parser.parse_args()
+
 print("="*70)
 print("DATABASE SETUP")
 print("="*70)
@@ -40,12 +62,13 @@ try:
     from sqlalchemy import create_engine, text
     from config.settings import settings
     from database.models import Base
+    from core.domain_models import TenderStatus
     
     print("\n🔧 Creating database connection...")
     
     # Create database URL
     database_url = (
-        f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}"
+        f"postgresql+psycopg://{settings.DB_USER}:{settings.DB_PASSWORD}"
         f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
     )
     
@@ -54,6 +77,77 @@ try:
     
     print("✓ Connected to database")
     
+    # Heavy ANN/GIN indexes on tender_chunks; dropped and rebuilt around bulk loads
+    HEAVY_INDEXES = {
+        # Binary-quantized embedding index (stage 1 of dense retrieval),
+        # partial so inactive file versions stay out of the graph
+        "tender_chunks_bin_embedding_idx": f"""
+            ON tender_chunks USING hnsw (bin_embedding bit_hamming_ops)
+            WITH (m = {settings.HNSW_M}, ef_construction = {settings.HNSW_EF_CONSTRUCTION})
+            WHERE is_active
+        """,
+        # Full-text index on the stored tsvector
+        "tender_chunks_chunk_tsv_idx": "ON tender_chunks USING gin (chunk_tsv)",
+        # BM25 tokens index
+        "tender_chunks_bm25_tokens_idx": "ON tender_chunks USING gin (bm25_tokens)",
+    }
+    
+    def create_heavy_indexes(conn):
+        for name, definition in HEAVY_INDEXES.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} {definition};"))
+    
+    def column_info(conn, table, column):
+        """(data_type, column_default) of a column, or None if it does not exist"""
+        return conn.execute(text("""
+            SELECT data_type, column_default FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = :table AND column_name = :column;
+        """), {"table": table, "column": column}).first()
+    
+    if args.bulk_mode == "start":
+        print("\n🚚 Bulk mode: dropping heavy indexes...")
+        with engine.connect() as conn:
+            for name in HEAVY_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name};"))
+                print(f"  ✓ Dropped {name}")
+            conn.commit()
+        engine.dispose()
+        print("\nRun ingestion now, then: python setup_db.py --bulk-mode finish")
+        sys.exit(0)
+    
+    if args.bulk_mode == "finish":
+        print("\n🚚 Bulk mode: rebuilding heavy indexes...")
+        # Rewrite chunks in (file, chunk_index) order so a document's chunks are
+        # read sequentially; done before the heavy indexes exist so CLUSTER
+        # does not have to rebuild them too. CLUSTER of the partitioned parent
+        # is refused inside a transaction (and before PostgreSQL 15 at all), so
+        # each partition is clustered on its own index, one autocommitted
+        # statement at a time
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"SET maintenance_work_mem = '{BULK_MAINTENANCE_WORK_MEM}';"))
+            partition_indexes = conn.execute(text("""
+                SELECT t.relname, i.relname
+                FROM pg_inherits inh
+                JOIN pg_class i ON i.oid = inh.inhrelid
+                JOIN pg_index x ON x.indexrelid = i.oid
+                JOIN pg_class t ON t.oid = x.indrelid
+                WHERE inh.inhparent = 'uq_chunk_file_idx'::regclass
+                ORDER BY t.relname;
+            """)).all()
+            for partition, index in partition_indexes:
+                conn.execute(text(f'CLUSTER "{partition}" USING "{index}";'))
+            print(f"  ✓ Clustered {len(partition_indexes)} tender_chunks partitions")
+        
+        # Index rebuild in its own transaction; re-running finish is safe if it fails
+        with engine.connect() as conn:
+            conn.execute(text(f"SET maintenance_work_mem = '{BULK_MAINTENANCE_WORK_MEM}';"))
+            conn.execute(text(f"SET max_parallel_maintenance_workers = {BULK_PARALLEL_MAINTENANCE_WORKERS};"))
+            create_heavy_indexes(conn)
+            conn.execute(text("ANALYZE tender_chunks;"))
+            conn.commit()
+        engine.dispose()
+        print("✓ Rebuilt indexes")
+        sys.exit(0)
+    
     # Enable pgvector
     print("\n🔧 Enabling pgvector extension...")
     with engine.connect() as conn:
@@ -61,45 +155,220 @@ try:
         conn.commit()
     print("✓ pgvector enabled")
     
-    # Drop existing tables
-    print("\n⚠️  Dropping existing tables...")
-    Base.metadata.drop_all(bind=engine)
-    print("✓ Dropped existing tables")
+    # Drop existing tables only when asked; otherwise every step below is
+    # idempotent, so re-running setup keeps ingested data and built indexes
+    if args.reset:
+        print("\n⚠️  Dropping existing tables...")
+        Base.metadata.drop_all(bind=engine)
+        print("✓ Dropped existing tables")
     
-    # Create all tables
+    # Databases created before partitioning have a plain tender_chunks table: set
+    # it aside so create_all builds the partitioned one; rows are copied back below
+    with engine.connect() as conn:
+        chunks_relkind = conn.execute(text("""
+            SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relname = 'tender_chunks';
+        """)).scalar()
+        if chunks_relkind == 'r':
+            print("\n🔀 Setting aside unpartitioned tender_chunks as tender_chunks_legacy...")
+            conn.execute(text("ALTER TABLE tender_chunks RENAME TO tender_chunks_legacy;"))
+            # Index and sequence names are schema-wide; free them for the new table
+            legacy_indexes = conn.execute(text("""
+                SELECT indexname FROM pg_indexes
+                WHERE schemaname = 'public' AND tablename = 'tender_chunks_legacy'
+                AND indexname <> 'tender_chunks_pkey';
+            """)).scalars().all()
+            for name in legacy_indexes:
+                conn.execute(text(f'DROP INDEX "{name}";'))
+            conn.execute(text("ALTER TABLE tender_chunks_legacy RENAME CONSTRAINT tender_chunks_pkey TO tender_chunks_legacy_pkey;"))
+            conn.execute(text("ALTER SEQUENCE IF EXISTS tender_chunks_id_seq RENAME TO tender_chunks_legacy_id_seq;"))
+            conn.commit()
+            print("✓ Set aside legacy chunks")
+    
+    # Create missing tables
     print("\n📊 Creating tables...")
     Base.metadata.create_all(bind=engine)
     print("✓ Created tables")
     
-    # Create indexes
-    print("\n⚡ Creating indexes...")
+    # Older tender_projects: Numeric tender_value, varchar tender_status, and
+    # client-side timestamps (the ORM now relies on server defaults)
+    with engine.connect() as conn:
+        if column_info(conn, "tender_projects", "tender_value") is not None:
+            print("\n🔀 Migrating tender_projects.tender_value to integer cents...")
+            conn.execute(text("ALTER TABLE tender_projects ADD COLUMN IF NOT EXISTS tender_value_cents BIGINT DEFAULT 0;"))
+            conn.execute(text("UPDATE tender_projects SET tender_value_cents = round(COALESCE(tender_value, 0) * 100)::bigint;"))
+            conn.execute(text("ALTER TABLE tender_projects DROP COLUMN tender_value;"))
+            print("✓ Migrated tender_value")
+        
+        status_info = column_info(conn, "tender_projects", "tender_status")
+        if status_info is not None and status_info[0] != "smallint":
+            print("\n🔀 Migrating tender_projects.tender_status to smallint...")
+            status_cases = " ".join(f"WHEN '{status.name.lower()}' THEN {int(status)}" for status in TenderStatus)
+            conn.execute(text("ALTER TABLE tender_projects ALTER COLUMN tender_status DROP DEFAULT;"))
+            conn.execute(text(f"""
+                ALTER TABLE tender_projects ALTER COLUMN tender_status TYPE smallint
+                USING (CASE lower(tender_status) {status_cases} ELSE {int(TenderStatus.OPEN)} END);
+            """))
+            conn.execute(text(f"""
+                ALTER TABLE tender_projects
+                ALTER COLUMN tender_status SET DEFAULT {int(TenderStatus.OPEN)},
+                ALTER COLUMN tender_status SET NOT NULL;
+            """))
+            print("✓ Migrated tender_status")
+        
+        for table in ("tender_projects", "tender_files"):
+            for column in ("created_at", "updated_at"):
+                info = column_info(conn, table, column)
+                if info is not None and info[1] is None:
+                    conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT now();"))
+        conn.commit()
+    
+    # Databases created before tender_file_summaries existed keep the large
+    # summary columns on tender_files; move them out so the ORM can read them
+    with engine.connect() as conn:
+        if column_info(conn, "tender_files", "summary") is not None:
+            print("\n🔀 Migrating tender_files summaries to tender_file_summaries...")
+            conn.execute(text("""
+                INSERT INTO tender_file_summaries (tender_file_id, summary, simple_summary, bm25_corpus)
+                SELECT tender_file_id, summary, simple_summary, bm25_corpus FROM tender_files
+                ON CONFLICT (tender_file_id) DO NOTHING;
+            """))
+            conn.execute(text("""
+                ALTER TABLE tender_files
+                DROP COLUMN summary, DROP COLUMN simple_summary, DROP COLUMN IF EXISTS bm25_corpus;
+            """))
+            conn.commit()
+            print("✓ Migrated summaries")
+    
+    # Create tender_chunks hash partitions
+    print(f"\n🧩 Creating {CHUNK_PARTITIONS} tender_chunks partitions...")
+    with engine.connect() as conn:
+        for remainder in range(CHUNK_PARTITIONS):
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS tender_chunks_p{remainder:02d}
+                PARTITION OF tender_chunks
+                FOR VALUES WITH (MODULUS {CHUNK_PARTITIONS}, REMAINDER {remainder});
+            """))
+        conn.commit()
+    print("✓ Created partitions")
+    
+    # Keep tender_chunks.is_active in sync with the parent file, maintain updated_at
+    print("\n🔁 Creating triggers...")
     with engine.connect() as conn:
-        # Dense embedding index
         conn.execute(text("""
-            CREATE INDEX IF NOT EXISTS tender_chunks_dense_embedding_idx 
-            ON tender_chunks USING hnsw (dense_embedding vector_cosine_ops);
+            CREATE OR REPLACE FUNCTION tender_chunks_set_is_active() RETURNS trigger AS $$
+            BEGIN
+                SELECT is_active INTO NEW.is_active
+                FROM tender_files WHERE tender_file_id = NEW.tender_file_id;
+                NEW.is_active := COALESCE(NEW.is_active, true);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
         """))
-        
-        # Sparse embedding index
+        conn.execute(text("DROP TRIGGER IF EXISTS tender_chunks_is_active_insert ON tender_chunks;"))
+        conn.execute(text("""
+            CREATE TRIGGER tender_chunks_is_active_insert
+            BEFORE INSERT ON tender_chunks
+            FOR EACH ROW EXECUTE FUNCTION tender_chunks_set_is_active();
+        """))
+        conn.execute(text("""
+            CREATE OR REPLACE FUNCTION tender_files_propagate_is_active() RETURNS trigger AS $$
+            BEGIN
+                UPDATE tender_chunks SET is_active = COALESCE(NEW.is_active, true)
+                WHERE tender_file_id = NEW.tender_file_id;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+        """))
+        conn.execute(text("DROP TRIGGER IF EXISTS tender_files_is_active_update ON tender_files;"))
         conn.execute(text("""
-            CREATE INDEX IF NOT EXISTS tender_chunks_sparse_embedding_idx 
-            ON tender_chunks USING gin (sparse_embedding);
+            CREATE TRIGGER tender_files_is_active_update
+            AFTER UPDATE OF is_active ON tender_files
+            FOR EACH ROW WHEN (OLD.is_active IS DISTINCT FROM NEW.is_active)
+            EXECUTE FUNCTION tender_files_propagate_is_active();
         """))
         
-        # BM25 tokens index
+        # updated_at is maintained by the server (models use server_onupdate)
         conn.execute(text("""
-            CREATE INDEX IF NOT EXISTS tender_chunks_bm25_tokens_idx 
-            ON tender_chunks USING gin (bm25_tokens);
+            CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+            BEGIN
+                NEW.updated_at := now();
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
         """))
+        for table in ("tender_projects", "tender_files"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_set_updated_at ON {table};"))
+            conn.execute(text(f"""
+                CREATE TRIGGER {table}_set_updated_at
+                BEFORE UPDATE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+            """))
+        conn.commit()
+    print("✓ Created triggers")
+    
+    # Copy rows from a set-aside unpartitioned tender_chunks (see above). The
+    # is_active insert trigger fills is_active; sparse vectors are rebuilt from
+    # bm25_tokens with the same md5 feature hashing as embedding_service (sparsevec
+    # text indices are 1-based). Copy and drop commit together, so a failed run
+    # leaves the legacy table in place for the next one
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT to_regclass('public.tender_chunks_legacy');")).scalar() is not None:
+            print("\n🔀 Copying legacy chunks into the partitioned tender_chunks...")
+            dim = settings.SPARSE_EMBEDDING_DIM
+            conn.execute(text(f"""
+                INSERT INTO tender_chunks (
+                    id, tender_file_id, chunk_index, chunk_text, chunk_metadata,
+                    dense_embedding, sparse_embedding, bm25_tokens, created_at
+                )
+                SELECT
+                    l.id, l.tender_file_id, l.chunk_index, l.chunk_text, l.chunk_metadata,
+                    l.dense_embedding::halfvec(768),
+                    (
+                        SELECT ('{{' || string_agg((s.idx + 1) || ':' || s.tf, ',' ORDER BY s.idx) || '}}/{dim}')::sparsevec({dim})
+                        FROM (
+                            SELECT ('x' || substr(md5(tok), 1, 8))::bit(32)::bigint % {dim} AS idx, count(*) AS tf
+                            FROM unnest(l.bm25_tokens) AS tok
+                            GROUP BY 1
+                        ) s
+                    ),
+                    l.bm25_tokens, COALESCE(l.created_at, now())
+                FROM tender_chunks_legacy l
+                ORDER BY l.tender_file_id, l.chunk_index;
+            """))
+            conn.execute(text("""
+                SELECT setval(
+                    pg_get_serial_sequence('tender_chunks', 'id'),
+                    COALESCE((SELECT max(id) FROM tender_chunks), 0) + 1, false
+                );
+            """))
+            conn.execute(text("DROP TABLE tender_chunks_legacy;"))
+            conn.commit()
+            print("✓ Copied legacy chunks")
+    
+    # Create indexes
+    print("\n⚡ Creating indexes...")
+    with engine.connect() as conn:
+        # More memory keeps the HNSW graph build in RAM
+        conn.execute(text("SET maintenance_work_mem = '1GB';"))
+        
+        create_heavy_indexes(conn)
         
         # Foreign key indexes
         conn.execute(text("""
             CREATE INDEX IF NOT EXISTS tender_files_tender_id_idx 
             ON tender_files(tender_id);
         """))
+        # tender_chunks(tender_file_id) is covered by the uq_chunk_file_idx constraint
+        
+        # BRIN indexes for time-range filters (rows arrive in created_at order)
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS tender_files_created_at_brin_idx 
+            ON tender_files USING brin (created_at) WITH (pages_per_range = 32);
+        """))
         conn.execute(text("""
-            CREATE INDEX IF NOT EXISTS tender_chunks_tender_file_id_idx 
-            ON tender_chunks(tender_file_id);
+            CREATE INDEX IF NOT EXISTS tender_chunks_created_at_brin_idx 
+            ON tender_chunks USING brin (created_at) WITH (pages_per_range = 32);
         """))
         
         conn.commit()
@@ -112,6 +381,7 @@ try:
             SELECT table_name FROM information_schema.tables 
             WHERE table_schema = 'public' 
             AND table_name LIKE 'tender%'
+            AND table_name NOT LIKE 'tender_chunks_p%'
             ORDER BY table_name;
         """))
         tables = result.fetchall()
@@ -0,0 +1,12 @@
+# tests/conftest.py
+"""
+Test configuration: settings validation needs an API key at import time
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+os.environ.setdefault("LOG_TO_STDOUT", "false")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
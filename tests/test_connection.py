@@ -0,0 +1,47 @@
+# tests/test_connection.py
+"""
+Tests for scoped session handling in get_db_session
+"""
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from database import connection
+from database.connection import DatabaseConnection, get_db_session
+
+
+def _use_sqlite_factory(monkeypatch):
+    factory = scoped_session(
+        sessionmaker(bind=create_engine("sqlite://")),
+        scopefunc=connection._current_scope
+    )
+    monkeypatch.setattr(DatabaseConnection, "_session_factory", factory)
+    return factory
+
+
+def test_nested_blocks_share_one_session(monkeypatch):
+    factory = _use_sqlite_factory(monkeypatch)
+    
+    with get_db_session() as outer:
+        with get_db_session() as inner:
+            assert inner is outer
+        assert factory.registry.has()
+    
+    assert not factory.registry.has()
+
+
+def test_worker_thread_sessions_are_removed_from_registry(monkeypatch):
+    factory = _use_sqlite_factory(monkeypatch)
+    
+    def work():
+        with get_db_session():
+            pass
+    
+    threads = [threading.Thread(target=work) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert factory.registry.registry == {}
@@ -0,0 +1,95 @@
+# tests/test_embedding_service.py
+"""
+Tests for embedding retry classification and batch fallback
+"""
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from services import embedding_service as embedding_module
+from services.embedding_service import EmbeddingService, _backoff_seconds, _is_transient
+from core.exceptions import EmbeddingRequestRejectedException
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(embedding_module.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(embedding_module.settings, "EMBED_BATCH_SIZE", 2)
+    return EmbeddingService(cache_repository=None)
+
+
+def _stub_embed_content(monkeypatch, batch_error=None, text_error=None):
+    """genai.embed_content stub: list content is a batch call, str content a per-text call"""
+    calls = []
+    
+    def embed_content(model, content, task_type):
+        calls.append(content)
+        if isinstance(content, list):
+            if batch_error is not None:
+                raise batch_error
+            return {"embedding": [[1.0] * 768 for _ in content]}
+        if text_error is not None:
+            raise text_error
+        return {"embedding": [0.5] * 768}
+    
+    monkeypatch.setattr(embedding_module.genai, "embed_content", embed_content)
+    return calls
+
+
+@pytest.mark.parametrize("error, transient", [
+    (google_exceptions.InvalidArgument("bad request"), False),
+    (google_exceptions.PermissionDenied("bad key"), False),
+    (google_exceptions.TooManyRequests("slow down"), True),
+    (google_exceptions.ResourceExhausted("quota"), True),
+    (google_exceptions.from_http_status(408, "timeout"), True),
+    (google_exceptions.ServiceUnavailable("unavailable"), True),
+    (ConnectionError("reset"), True),
+])
+def test_is_transient(error, transient):
+    assert _is_transient(error) is transient
+
+
+def test_backoff_prefers_retry_after():
+    error = google_exceptions.TooManyRequests(
+        "slow down", response=SimpleNamespace(headers={"Retry-After": "7"})
+    )
+    
+    assert _backoff_seconds(1, error) == 7.0
+
+
+def test_backoff_is_jittered_and_capped():
+    error = google_exceptions.ServiceUnavailable("unavailable")
+    
+    assert all(0 <= _backoff_seconds(3, error) <= 8 for _ in range(100))
+    assert all(0 <= _backoff_seconds(10, error) <= 30 for _ in range(100))
+
+
+def test_rejected_batch_fails_without_per_text_fallback(service, monkeypatch):
+    calls = _stub_embed_content(monkeypatch, batch_error=google_exceptions.InvalidArgument("bad request"))
+    
+    with pytest.raises(EmbeddingRequestRejectedException):
+        service.batch_generate_dense_embeddings(["a", "b", "c", "d"], "retrieval_document")
+    
+    assert all(isinstance(content, list) for content in calls)
+    assert len(calls) <= 2
+
+
+def test_transient_batch_failure_falls_back_to_per_text_calls(service, monkeypatch):
+    calls = _stub_embed_content(monkeypatch, batch_error=google_exceptions.ServiceUnavailable("unavailable"))
+    
+    embeddings = service.batch_generate_dense_embeddings(["a", "b", "c"], "retrieval_document")
+    
+    assert embeddings == [[0.5] * 768] * 3
+    assert sorted(content for content in calls if isinstance(content, str)) == ["a", "b", "c"]
+
+
+def test_rejected_per_text_call_is_raised(service, monkeypatch):
+    _stub_embed_content(
+        monkeypatch,
+        batch_error=google_exceptions.ServiceUnavailable("unavailable"),
+        text_error=google_exceptions.PermissionDenied("bad key"),
+    )
+    
+    with pytest.raises(EmbeddingRequestRejectedException):
+        service.batch_generate_dense_embeddings(["a", "b"], "retrieval_document")
@@ -0,0 +1,109 @@
+# tests/test_ingestion_workflow.py
+"""
+Tests for the tender details extraction node
+"""
+import json
+from types import SimpleNamespace
+
+from workflows import ingestion_workflow
+
+
+class _StubModel:
+    """Extraction model returning the given JSON bodies in turn (the last one repeats)"""
+    
+    def __init__(self, *responses):
+        self.texts = [json.dumps(details) for details in responses]
+        self.prompts = []
+    
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        text = self.texts[min(len(self.prompts), len(self.texts)) - 1]
+        return SimpleNamespace(text=text)
+
+
+def _run_extraction(monkeypatch, *responses, raw_text="Tender document text"):
+    model = _StubModel(*responses)
+    monkeypatch.setattr(ingestion_workflow.settings, "TENDER_DETAILS_CACHE_ENABLED", False)
+    monkeypatch.setattr(ingestion_workflow.model_config, "get_extraction_model", lambda: model)
+    result = ingestion_workflow.extract_tender_details({"raw_text": raw_text, "error": ""})
+    return result, model
+
+
+def test_null_fields_keep_extracted_details(monkeypatch):
+    details = {
+        "tender_id": "TN-2024-001",
+        "project_title": None,
+        "issuing_authority": "Public Works Department",
+        "location": None,
+        "project_value": "₹1,49,81,795",
+        "emd_amount": None,
+        "summary": None,
+        "tender_date": "2024-03-01",
+        "submission_deadline": None,
+    }
+    
+    result, _ = _run_extraction(monkeypatch, details)
+    
+    extracted = result["extracted_tender_details"]
+    assert extracted["tender_id"] == "TN-2024-001"
+    assert extracted["issuing_authority"] == "Public Works Department"
+    assert extracted["project_value"] == "₹1,49,81,795"
+    assert extracted["summary"] is None
+    
+    structured = result["structured_data"]
+    assert structured["file_name"] == "Tender Document"
+    assert structured["tender_date"] == "2024-03-01"
+    assert structured["submission_deadline"] is None
+    assert structured["tender_value_cents"] == 1498179500
+
+
+def test_placeholder_strings_become_none(monkeypatch):
+    details = {
+        "tender_id": "N/A",
+        "project_title": "Road Widening",
+        "project_value": "Not found",
+        "summary": "null",
+    }
+    
+    result, _ = _run_extraction(monkeypatch, details)
+    
+    extracted = result["extracted_tender_details"]
+    assert extracted["tender_id"] is None
+    assert extracted["summary"] is None
+    assert result["structured_data"]["file_name"] == "Road Widening"
+
+
+_KEY_DETAILS = {
+    "tender_id": "TN-2024-001",
+    "project_title": "Road Widening",
+    "project_value": "₹1,49,81,795",
+}
+
+
+def test_preview_with_key_details_makes_one_call(monkeypatch):
+    raw_text = "x" * 30000
+    
+    _, model = _run_extraction(monkeypatch, _KEY_DETAILS, raw_text=raw_text)
+    
+    assert len(model.prompts) == 1
+    assert "x" * 5000 in model.prompts[0]
+    assert "x" * 5001 not in model.prompts[0]
+
+
+def test_missing_key_details_escalate_once_to_full_window(monkeypatch):
+    raw_text = "x" * 30000
+    
+    result, model = _run_extraction(
+        monkeypatch, {"tender_id": "TN-2024-001"}, {"tender_id": "TN-2024-001"}, raw_text=raw_text
+    )
+    
+    assert len(model.prompts) == 2
+    assert "x" * 25000 in model.prompts[1]
+    assert "x" * 25001 not in model.prompts[1]
+    assert result["extracted_tender_details"]["tender_id"] == "TN-2024-001"
+
+
+def test_short_document_is_not_resent(monkeypatch):
+    _, model = _run_extraction(monkeypatch, {"tender_id": None})
+    
+    assert len(model.prompts) == 1
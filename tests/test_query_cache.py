@@ -0,0 +1,55 @@
+# tests/test_query_cache.py
+"""
+Tests for the semantic query cache
+"""
+import numpy as np
+
+from services.query_cache import SemanticQueryCache
+
+
+def _unit(dim, index):
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[index] = 1.0
+    return vector.tolist()
+
+
+def test_bucket_grows_lazily_up_to_capacity():
+    cache = SemanticQueryCache(threshold=0.99, max_entries=20, max_buckets=4)
+    
+    cache.put((1, "simple"), _unit(768, 0), {"answer": "a"})
+    bucket = cache._buckets[(1, "simple")]
+    assert bucket.vectors.shape == (8, 768)
+    
+    for i in range(1, 25):
+        cache.put((1, "simple"), _unit(768, i), {"answer": str(i)})
+    assert bucket.vectors.shape == (20, 768)
+    assert bucket.size == 20
+    # The oldest questions were evicted, the newest are still served
+    assert cache.get((1, "simple"), _unit(768, 0)) is None
+    assert cache.get((1, "simple"), _unit(768, 24)) == {"answer": "24"}
+
+
+def test_least_recently_used_bucket_is_evicted():
+    cache = SemanticQueryCache(threshold=0.99, max_entries=4, max_buckets=2)
+    
+    cache.put((1, "simple"), _unit(8, 0), {"answer": "one"})
+    cache.put((2, "simple"), _unit(8, 0), {"answer": "two"})
+    assert cache.get((1, "simple"), _unit(8, 0)) == {"answer": "one"}
+    cache.put((3, "simple"), _unit(8, 0), {"answer": "three"})
+    
+    assert cache.get((2, "simple"), _unit(8, 0)) is None
+    assert cache.get((1, "simple"), _unit(8, 0)) == {"answer": "one"}
+    assert cache.get((3, "simple"), _unit(8, 0)) == {"answer": "three"}
+
+
+def test_invalidate_drops_every_level_for_a_file():
+    cache = SemanticQueryCache(threshold=0.99, max_entries=4, max_buckets=8)
+    
+    cache.put((1, "simple"), _unit(8, 0), {"answer": "s"})
+    cache.put((1, "professional"), _unit(8, 0), {"answer": "p"})
+    cache.put((2, "simple"), _unit(8, 0), {"answer": "other"})
+    cache.invalidate(1)
+    
+    assert cache.get((1, "simple"), _unit(8, 0)) is None
+    assert cache.get((1, "professional"), _unit(8, 0)) is None
+    assert cache.get((2, "simple"), _unit(8, 0)) == {"answer": "other"}
@@ -0,0 +1,37 @@
+# tests/test_request_logging.py
+"""
+Tests for the pure ASGI request logging middleware
+"""
+import asyncio
+
+from main import RequestLoggingMiddleware
+
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _call(scope):
+    sent = []
+    
+    async def receive():
+        return {"type": "http.request", "body": b""}
+    
+    async def send(message):
+        sent.append(message)
+    
+    asyncio.run(RequestLoggingMiddleware(_ok_app)(scope, receive, send))
+    return sent
+
+
+def test_scope_without_raw_path_is_served():
+    sent = _call({"type": "http", "method": "GET", "path": "/health"})
+    
+    assert sent[0]["status"] == 204
+
+
+def test_scope_with_raw_path_is_served():
+    sent = _call({"type": "http", "method": "GET", "path": "/health", "raw_path": b"/health"})
+    
+    assert sent[0]["status"] == 204
@@ -0,0 +1,33 @@
+# utils/log_handlers.py
+"""
+Buffered logging handlers for the background log listener
+"""
+import logging
+import logging.handlers
+
+FILE_BUFFER_BYTES = 1 << 16
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """FileHandler on a large write buffer that does not flush after every record"""
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=FILE_BUFFER_BYTES, encoding=self.encoding)
+    
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingMemoryHandler(logging.handlers.MemoryHandler):
+    """MemoryHandler that flushes its target stream once per batch"""
+    
+    def flush(self):
+        super().flush()
+        with self.lock:
+            if self.target:
+                self.target.flush()
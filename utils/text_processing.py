@@ -6,12 +6,15 @@ import string
 from typing import List
 
 # Stopwords for BM25
-STOPWORDS = {
+STOPWORDS = frozenset({
     'that', 'this', 'with', 'from', 'have', 'will', 'your', 'their', 'which', 
     'were', 'been', 'there', 'would', 'about', 'should', 'could', 'these', 
     'those', 'shall', 'must', 'and', 'the', 'for', 'is', 'in', 'it', 'to', 
     'of', 'as', 'at', 'by', 'an', 'are', 'on', 'if', 'or', 'not', 'be', 'all'
-}
+})
+
+# Punctuation-deleting translation table, built once rather than per call
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
 
 
 def preprocess_text(text: str) -> List[str]:
@@ -27,17 +30,11 @@ def preprocess_text(text: str) -> List[str]:
     if not text:
         return []
     
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove punctuation
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    
-    # Tokenize and filter stopwords
-    tokens = text.split()
-    tokens = [token for token in tokens if token not in STOPWORDS and len(token) > 2]
-    
-    return tokens
+    # Lowercase, strip punctuation, tokenize, then filter short tokens and stopwords
+    return [
+        token for token in text.lower().translate(_PUNCT_TABLE).split()
+        if len(token) > 2 and token not in STOPWORDS
+    ]
 
 
 def chunk_text(text: str, max_size: int, overlap: int = 100) -> List[str]:
@@ -95,10 +92,12 @@ def truncate_for_embedding(text: str, max_chars: int) -> str:
     # Truncate at the limit
     truncated = text[:max_chars]
     
-    # Try to break at last sentence boundary to avoid cutting mid-sentence
-    for punct in ['. ', '! ', '? ', '\n\n']:
-        last_break = truncated.rfind(punct)
-        if last_break > max_chars * 0.8:  # Only use if we're not losing too much
+    # Try to break at last sentence boundary to avoid cutting mid-sentence; only
+    # breaks in the last 20% are usable, so each search scans just that tail
+    min_break = int(max_chars * 0.8) + 1
+    for punct in ('. ', '! ', '? ', '\n\n'):
+        last_break = truncated.rfind(punct, min_break)
+        if last_break != -1:
             return truncated[:last_break + 1].strip()
     
     # If no good break point, just truncate
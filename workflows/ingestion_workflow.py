@@ -2,33 +2,104 @@
 Ingestion Workflow using LangGraph - Enhanced with Tender Details Extraction
 """
 import re
-import json
+import hashlib
 import logging
+import tempfile
 import concurrent.futures
-from typing import List
-from io import BytesIO
+from typing import Any, Dict, Iterator, List, Optional
+import orjson
 import requests
-import PyPDF2
-from rank_bm25 import BM25Okapi
+from requests.adapters import HTTPAdapter
+import pypdfium2 as pdfium
 from langgraph.graph import StateGraph, END
 
 from workflows.workflow_states import TenderIngestionState
-from services.embedding_service import EmbeddingService
-from repositories.tender_project_repository import TenderProjectRepository
-from repositories.tender_file_repository import TenderFileRepository
-from repositories.tender_chunk_repository import TenderChunkRepository
-from core.domain_models import TenderProject, TenderFile, TenderChunk
+from services.embedding_service import embedding_service
+from repositories.tender_project_repository import tender_project_repository as project_repo
+from repositories.tender_file_repository import tender_file_repository as file_repo
+from repositories.tender_chunk_repository import tender_chunk_repository as chunk_repo
+from repositories.tender_details_cache_repository import tender_details_cache_repository
+from database.connection import get_db_session
+from core.domain_models import TenderProject, TenderFile, TenderChunk, TenderStatus
 from utils.text_processing import preprocess_text
 from config.settings import settings
 from config.model_config import model_config
 
 logger = logging.getLogger(__name__)
 
-# Initialize services and repositories
-embedding_service = EmbeddingService()
-project_repo = TenderProjectRepository()
-file_repo = TenderFileRepository()
-chunk_repo = TenderChunkRepository()
+# Patterns compiled once at import; project value patterns are tried in order
+_PROJECT_VALUE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'Total\s+Estimated\s+Cost[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
+        r'Project\s+Cost[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
+        r'Estimated\s+Amount[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
+        r'Contract\s+Value[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
+        r'Total\s+Value[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
+        r'Tender\s+Value[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
+    )
+]
+_CURRENCY_NOISE_RE = re.compile(r'[₹$€£,\s]')
+# Any whitespace run spanning two or more newlines is a paragraph break
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+
+
+def _build_http_session() -> requests.Session:
+    """Shared download session: keeps TCP/TLS connections to tender portals alive across ingestions"""
+    session = requests.Session()
+    session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    session.verify = False
+    # One pooled connection per concurrent ingestion job and host
+    adapter = HTTPAdapter(pool_maxsize=settings.MAX_CONCURRENT_INGESTIONS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_http_session = _build_http_session()
+
+# Placeholder strings the LLM uses for a missing field
+_MISSING_VALUES = frozenset({"null", "None", "N/A", "Not found", "Not specified", ""})
+
+# Bump when the extraction prompt or schema changes so cached extractions are not reused
+_TENDER_DETAILS_PROMPT_VERSION = 2
+
+# Fields that, once found, make a larger extraction window unnecessary
+_KEY_DETAIL_FIELDS = ("tender_id", "project_title", "project_value")
+
+_TENDER_DETAILS_PROMPT = """
+Analyze this tender document carefully and extract the following information.
+Respond ONLY with valid JSON containing these exact fields:
+
+{{
+    "tender_id": "Extract the unique tender ID/number/reference from the document",
+    "project_title": "Extract the project name/title",
+    "issuing_authority": "Extract the organization/department issuing this tender",
+    "location": "Extract the project location/site",
+    "project_value": "Extract the TOTAL ESTIMATED PROJECT COST/VALUE with currency symbol (NOT the EMD amount)",
+    "emd_amount": "Extract the EMD/Earnest Money Deposit amount with currency symbol",
+    "summary": "Write a brief 1-2 line summary of what this project is about",
+    "tender_date": "Extract tender issue date in YYYY-MM-DD format if available",
+    "submission_deadline": "Extract submission deadline in YYYY-MM-DDTHH:MM:SSZ format if available"
+}}
+
+CRITICAL INSTRUCTIONS:
+- For project_value: Look for terms like "Total Estimated Cost", "Project Cost", "Contract Value", "Estimated Amount", "Total Value"
+  This should be the LARGEST amount in the document (NOT the EMD/Earnest Money Deposit)
+  Include currency symbol in the value (e.g., "Rs. 1,49,81,795.00" or "₹1,49,81,795")
+- For emd_amount: Look for "EMD", "Earnest Money", "Bid Security" - this is usually a smaller amount
+  Include currency symbol (e.g., "Rs. 2,99,636/-")
+- The project_value should typically be much larger than emd_amount (often 10-100x larger)
+- If a field is not found, use null
+- For dates, use exact formats specified
+- Summary should be concise (1-2 lines max)
+- Respond ONLY with the JSON object, no other text
+
+Document content:
+{raw_text}
+
+JSON:
+"""
 
 
 # ============================================================================
@@ -40,20 +111,11 @@ def extract_project_value_from_text(text: str) -> str:
     Try to extract project value using regex patterns
     Looks for common patterns like "Total Estimated Cost", "Project Cost", etc.
     """
-    patterns = [
-        r'Total\s+Estimated\s+Cost[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
-        r'Project\s+Cost[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
-        r'Estimated\s+Amount[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
-        r'Contract\s+Value[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
-        r'Total\s+Value[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
-        r'Tender\s+Value[:\s]+(?:Rs\.?|₹)\s*([\d,\.]+)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _PROJECT_VALUE_PATTERNS:
+        match = pattern.search(text)
         if match:
             value = match.group(1)
-            logger.debug(f"Found project value using pattern: {pattern[:30]}... -> {value}")
+            logger.debug(f"Found project value using pattern: {pattern.pattern[:30]}... -> {value}")
             return f"Rs. {value}"
     
     return None
@@ -67,12 +129,12 @@ def clean_currency_value(value: str) -> float:
         "$1,000,000" -> 1000000.0
         "50,00,000" -> 5000000.0
     """
-    if not value or value in ["null", "None", "N/A", "Not found", "Not specified"]:
+    if not value or value in _MISSING_VALUES:
         return 0.0
     
     try:
         # Remove currency symbols and whitespace
-        cleaned = re.sub(r'[₹$€£,\s]', '', str(value))
+        cleaned = _CURRENCY_NOISE_RE.sub('', str(value))
         # Convert to float
         return float(cleaned)
     except (ValueError, TypeError):
@@ -80,15 +142,32 @@ def clean_currency_value(value: str) -> float:
         return 0.0
 
 
+def _has_iso_date_prefix(value: str) -> bool:
+    """True if value starts with YYYY-MM-DD (fixed positions, no regex)"""
+    return (
+        len(value) >= 10 and value[4] == '-' and value[7] == '-'
+        and value[:4].isdecimal() and value[5:7].isdecimal() and value[8:10].isdecimal()
+    )
+
+
+def _has_iso_datetime_prefix(value: str) -> bool:
+    """True if value starts with YYYY-MM-DDTHH:MM:SS"""
+    return (
+        len(value) >= 19 and _has_iso_date_prefix(value)
+        and value[10] == 'T' and value[13] == ':' and value[16] == ':'
+        and value[11:13].isdecimal() and value[14:16].isdecimal() and value[17:19].isdecimal()
+    )
+
+
 def parse_date(date_str: str) -> str:
     """
     Ensure date is in proper format or return None
     """
-    if not date_str or date_str in ["null", "None", "N/A", "Not found", "Not specified"]:
+    if not date_str or date_str in _MISSING_VALUES:
         return None
     
     # If already in correct format, return as-is
-    if re.match(r'\d{4}-\d{2}-\d{2}', date_str):
+    if _has_iso_date_prefix(date_str):
         return date_str
     
     return None
@@ -98,16 +177,105 @@ def parse_datetime(datetime_str: str) -> str:
     """
     Ensure datetime is in proper format or return None
     """
-    if not datetime_str or datetime_str in ["null", "None", "N/A", "Not found", "Not specified"]:
+    if not datetime_str or datetime_str in _MISSING_VALUES:
         return None
     
     # If already in correct format, return as-is
-    if re.match(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}', datetime_str):
+    if _has_iso_datetime_prefix(datetime_str):
         return datetime_str
     
     return None
 
 
+def iter_paragraphs(text: str) -> Iterator[str]:
+    """
+    Yield the pieces of text between "\n\n" separators, one at a time
+    (same pieces as text.split("\n\n"), without building the list);
+    fetch_pdf_from_url normalizes every paragraph break to exactly "\n\n"
+    """
+    start = 0
+    while True:
+        end = text.find("\n\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 2
+
+
+def _has_key_details(details: Dict[str, Any]) -> bool:
+    """Whether tender_id, project_title and project_value were all found"""
+    return all(
+        details.get(field) is not None and details.get(field) not in _MISSING_VALUES
+        for field in _KEY_DETAIL_FIELDS
+    )
+
+
+def _request_tender_details(raw_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Ask the LLM for tender details on the first TENDER_DETAILS_PREVIEW_CHARS of
+    the document, escalating once to the full text if key fields are missing
+    """
+    # Structured output: the response body is the JSON object itself
+    model = model_config.get_extraction_model()
+    tender_details = None
+    
+    windows = [settings.TENDER_DETAILS_PREVIEW_CHARS]
+    # A second call only helps if it sends more text than the first
+    if len(raw_text) > settings.TENDER_DETAILS_PREVIEW_CHARS:
+        windows.append(len(raw_text))
+    
+    for window in windows:
+        response = model.generate_content(_TENDER_DETAILS_PROMPT.format(raw_text=raw_text[:window]))
+        logger.debug(f"LLM Response ({window} chars of input): {response.text[:500]}")
+        
+        try:
+            parsed = orjson.loads(response.text)
+        except orjson.JSONDecodeError:
+            parsed = None
+        
+        if isinstance(parsed, dict):
+            tender_details = parsed
+            if _has_key_details(parsed):
+                break
+        
+        if window < len(raw_text):
+            logger.info(f"Key tender details missing after {window} chars, retrying with the full text")
+    
+    return tender_details
+
+
+def _tender_details_cache_key(raw_text: str) -> bytes:
+    """Content hash of (model, prompt version, extraction input)"""
+    return hashlib.sha256(
+        f"{settings.SUMMARY_MODEL}|{_TENDER_DETAILS_PROMPT_VERSION}|{raw_text}".encode()
+    ).digest()
+
+
+def _get_cached_tender_details(key: bytes) -> Optional[Dict[str, Any]]:
+    """Cached extraction, if any; the cache is best-effort and never fails ingestion"""
+    if not settings.TENDER_DETAILS_CACHE_ENABLED:
+        return None
+    try:
+        details = tender_details_cache_repository.get(key)
+    except Exception as e:
+        logger.warning(f"Tender details cache lookup failed: {e}")
+        return None
+    if details is not None:
+        logger.info("✓ Tender details served from cache")
+    return details
+
+
+def _put_cached_tender_details(key: bytes, details: Dict[str, Any]):
+    """Store a fresh extraction (before any post-processing)"""
+    if not settings.TENDER_DETAILS_CACHE_ENABLED:
+        return
+    try:
+        tender_details_cache_repository.put(key, details)
+    except Exception as e:
+        logger.warning(f"Tender details cache store failed: {e}")
+
+
 # ============================================================================
 # WORKFLOW NODES
 # ============================================================================
@@ -117,27 +285,40 @@ def fetch_pdf_from_url(state: TenderIngestionState) -> TenderIngestionState:
     try:
         logger.info(f"Fetching PDF from: {state['file_url']}")
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(state['file_url'], timeout=30, headers=headers, verify=False)
-        response.raise_for_status()
-        
-        pdf_file = BytesIO(response.content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        raw_text = ""
-        for page_num, page in enumerate(pdf_reader.pages):
-            page_text = page.extract_text()
-            if page_text:
-                raw_text += f"\n--- Page {page_num + 1} ---\n{page_text}"
-        
-        raw_text = re.sub(r'(\n\s*)+\n', '\n', raw_text)
+        # Stream the body into a spooled file: small PDFs stay in memory, large
+        # ones spill to disk instead of being held twice (response + BytesIO)
+        with _http_session.get(state['file_url'], stream=True, timeout=30) as response, \
+                tempfile.SpooledTemporaryFile(max_size=settings.PDF_SPOOL_MAX_MEMORY) as pdf_file:
+            response.raise_for_status()
+            for block in response.iter_content(chunk_size=1 << 16):
+                pdf_file.write(block)
+            pdf_file.seek(0)
+            
+            # PDFium (native) text extraction; pages and text pages are closed as
+            # soon as they are read so large documents do not pin native memory
+            pdf = pdfium.PdfDocument(pdf_file)
+            try:
+                page_count = len(pdf)
+                parts = []
+                for page_num in range(page_count):
+                    page = pdf[page_num]
+                    textpage = page.get_textpage()
+                    try:
+                        page_text = textpage.get_text_range().replace("\r\n", "\n")
+                    finally:
+                        textpage.close()
+                        page.close()
+                    if page_text:
+                        parts.append(f"\n--- Page {page_num + 1} ---\n{page_text}")
+            finally:
+                pdf.close()
+        
+        raw_text = "".join(parts)
+        raw_text = _BLANK_LINES_RE.sub('\n\n', raw_text)
         state['raw_text'] = raw_text
         state['error'] = ""
         
-        logger.info(f"Extracted {len(raw_text)} characters from {len(pdf_reader.pages)} pages")
+        logger.info(f"Extracted {len(raw_text)} characters from {page_count} pages")
         
     except Exception as e:
         state['error'] = f"PDF fetch error: {str(e)}"
@@ -148,62 +329,29 @@ def fetch_pdf_from_url(state: TenderIngestionState) -> TenderIngestionState:
 
 def extract_tender_details(state: TenderIngestionState) -> TenderIngestionState:
     """Extract detailed tender information using LLM"""
+    # Runs in parallel with generate_embeddings, so only its own keys are returned
     if state.get('error'):
-        return state
+        return {}
     
     try:
         logger.info("Extracting tender details from document")
         
-        # Use more text for better extraction (first 25000 characters)
-        raw_text = state['raw_text'][:25000]
-        
-        prompt = f"""
-Analyze this tender document carefully and extract the following information.
-Respond ONLY with valid JSON containing these exact fields:
-
-{{
-    "tender_id": "Extract the unique tender ID/number/reference from the document",
-    "project_title": "Extract the project name/title",
-    "issuing_authority": "Extract the organization/department issuing this tender",
-    "location": "Extract the project location/site",
-    "project_value": "Extract the TOTAL ESTIMATED PROJECT COST/VALUE with currency symbol (NOT the EMD amount)",
-    "emd_amount": "Extract the EMD/Earnest Money Deposit amount with currency symbol",
-    "summary": "Write a brief 1-2 line summary of what this project is about",
-    "tender_date": "Extract tender issue date in YYYY-MM-DD format if available",
-    "submission_deadline": "Extract submission deadline in YYYY-MM-DDTHH:MM:SSZ format if available"
-}}
-
-CRITICAL INSTRUCTIONS:
-- For project_value: Look for terms like "Total Estimated Cost", "Project Cost", "Contract Value", "Estimated Amount", "Total Value"
-  This should be the LARGEST amount in the document (NOT the EMD/Earnest Money Deposit)
-  Include currency symbol in the value (e.g., "Rs. 1,49,81,795.00" or "₹1,49,81,795")
-- For emd_amount: Look for "EMD", "Earnest Money", "Bid Security" - this is usually a smaller amount
-  Include currency symbol (e.g., "Rs. 2,99,636/-")
-- The project_value should typically be much larger than emd_amount (often 10-100x larger)
-- If a field is not found, use null
-- For dates, use exact formats specified
-- Summary should be concise (1-2 lines max)
-- Respond ONLY with the JSON object, no other text
-
-Document content:
-{raw_text}
-
-JSON:
-"""
+        # Use more text for better extraction (first 25000 characters by default)
+        raw_text = state['raw_text'][:settings.TENDER_DETAILS_MAX_CHARS]
         
-        model = model_config.get_summary_model()
-        response = model.generate_content(prompt)
+        # Identical document text (re-uploads) reuses the stored extraction
+        cache_key = _tender_details_cache_key(raw_text)
+        tender_details = _get_cached_tender_details(cache_key)
         
-        logger.debug(f"LLM Response: {response.text[:500]}")
+        if tender_details is None:
+            tender_details = _request_tender_details(raw_text)
+            if isinstance(tender_details, dict):
+                _put_cached_tender_details(cache_key, tender_details)
         
-        # Extract JSON from response
-        json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-        if json_match:
-            tender_details = json.loads(json_match.group(0))
-            
+        if isinstance(tender_details, dict):
             # Clean up null strings to actual None
             for key, value in tender_details.items():
-                if value in ["null", "None", "N/A", "Not found", "Not specified", ""]:
+                if isinstance(value, str) and value in _MISSING_VALUES:
                     tender_details[key] = None
             
             # Get project_value and emd_amount
@@ -260,24 +408,24 @@ JSON:
             
             # Store structured data for database (with numeric values)
             state['structured_data'] = {
-                "file_name": tender_details.get('project_title', 'Tender Document'),
+                "file_name": tender_details.get('project_title') or 'Tender Document',
                 "tender_date": tender_date,
                 "submission_deadline": submission_deadline,
-                "tender_status": "Open",
-                "tender_value": project_value_numeric,  # Numeric value for DB
+                "tender_status": TenderStatus.OPEN,
+                "tender_value_cents": int(round(project_value_numeric * 100)),  # Integer cents for DB
             }
             
             logger.info(f"✓ Extracted tender details:")
-            logger.info(f"  Tender ID: {tender_details.get('tender_id', 'N/A')}")
-            logger.info(f"  Project Title: {tender_details.get('project_title', 'N/A')}")
-            logger.info(f"  Issuing Authority: {tender_details.get('issuing_authority', 'N/A')}")
-            logger.info(f"  Location: {tender_details.get('location', 'N/A')}")
+            logger.info(f"  Tender ID: {tender_details.get('tender_id') or 'N/A'}")
+            logger.info(f"  Project Title: {tender_details.get('project_title') or 'N/A'}")
+            logger.info(f"  Issuing Authority: {tender_details.get('issuing_authority') or 'N/A'}")
+            logger.info(f"  Location: {tender_details.get('location') or 'N/A'}")
             logger.info(f"  Project Value: {project_value_raw} (DB: {project_value_numeric})")
             logger.info(f"  EMD Amount: {emd_amount_raw}")
-            logger.info(f"  Summary: {tender_details.get('summary', 'N/A')[:100]}...")
+            logger.info(f"  Summary: {(tender_details.get('summary') or 'N/A')[:100]}...")
             
         else:
-            logger.warning("Could not extract JSON from LLM response")
+            logger.warning("Could not parse JSON from LLM response")
             state['extracted_tender_details'] = {
                 "tender_id": None,
                 "project_title": None,
@@ -289,7 +437,7 @@ JSON:
             }
             state['structured_data'] = {
                 "file_name": "Tender Document",
-                "tender_value": 0.0
+                "tender_value_cents": 0
             }
             
     except Exception as e:
@@ -305,10 +453,13 @@ JSON:
         }
         state['structured_data'] = {
             "file_name": "Tender Document",
-            "tender_value": 0.0
+            "tender_value_cents": 0
         }
     
-    return state
+    return {
+        "extracted_tender_details": state['extracted_tender_details'],
+        "structured_data": state['structured_data'],
+    }
 
 
 def chunk_document(state: TenderIngestionState) -> TenderIngestionState:
@@ -320,10 +471,13 @@ def chunk_document(state: TenderIngestionState) -> TenderIngestionState:
         logger.info("Chunking document")
         
         raw_text = state['raw_text']
-        paragraphs = re.split(r'\n\s*\n', raw_text)
+        paragraphs = iter_paragraphs(raw_text)
         
         chunks = []
-        current_chunk = ""
+        # Paragraphs of the chunk being built, and its length as if joined with
+        # a trailing "\n\n" after each; joined once when the chunk is flushed
+        current_parts = []
+        current_len = 0
         chunk_index = 0
         
         for para in paragraphs:
@@ -331,22 +485,24 @@ def chunk_document(state: TenderIngestionState) -> TenderIngestionState:
             if not para:
                 continue
             
-            if len(current_chunk) + len(para) + 1 > settings.MAX_CHUNK_SIZE and current_chunk:
+            if current_len + len(para) + 1 > settings.MAX_CHUNK_SIZE and current_parts:
                 chunks.append({
                     "chunk_index": chunk_index,
-                    "text": current_chunk.strip(),
-                    "metadata": {"chunk_size": len(current_chunk), "source": state['file_url']}
+                    "text": "\n\n".join(current_parts),
+                    "metadata": {"chunk_size": current_len, "source": state['file_url']}
                 })
-                current_chunk = ""
+                current_parts = []
+                current_len = 0
                 chunk_index += 1
             
-            current_chunk += para + "\n\n"
+            current_parts.append(para)
+            current_len += len(para) + 2
         
-        if current_chunk.strip():
+        if current_parts:
             chunks.append({
                 "chunk_index": chunk_index,
-                "text": current_chunk.strip(),
-                "metadata": {"chunk_size": len(current_chunk), "source": state['file_url']}
+                "text": "\n\n".join(current_parts),
+                "metadata": {"chunk_size": current_len, "source": state['file_url']}
             })
         
         state['chunks'] = chunks
@@ -361,8 +517,9 @@ def chunk_document(state: TenderIngestionState) -> TenderIngestionState:
 
 def generate_hybrid_embeddings(state: TenderIngestionState) -> TenderIngestionState:
     """Generate dense and sparse embeddings in parallel"""
+    # Runs in parallel with extract_details, so only its own keys are returned
     if state.get('error') or not state.get('chunks'):
-        return state
+        return {}
     
     try:
         logger.info("Generating embeddings")
@@ -370,32 +527,34 @@ def generate_hybrid_embeddings(state: TenderIngestionState) -> TenderIngestionSt
         chunks = state['chunks']
         chunk_texts = [chunk['text'] for chunk in chunks]
         
-        # Dense embeddings (parallel)
-        logger.debug(f"Generating dense embeddings using {settings.MAX_PARALLEL_WORKERS} workers")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=settings.MAX_PARALLEL_WORKERS) as executor:
-            dense_embeddings = list(executor.map(
-                lambda text: embedding_service.generate_dense_embedding(text, "retrieval_document"),
-                chunk_texts
-            ))
-        
-        # Sparse embeddings (parallel tokenization)
-        logger.debug("Generating sparse embeddings")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=settings.MAX_PARALLEL_WORKERS) as executor:
-            tokenized_chunks = list(executor.map(preprocess_text, chunk_texts))
-        
-        sparse_embeddings = [
-            embedding_service.generate_sparse_embedding(tokens)
-            for tokens in tokenized_chunks
-        ]
-        
-        # BM25 corpus stats
-        if tokenized_chunks and any(len(t) > 0 for t in tokenized_chunks):
-            bm25 = BM25Okapi(tokenized_chunks)
-            if 'structured_data' not in state:
-                state['structured_data'] = {}
-            state['structured_data']['bm25_corpus'] = {
-                'avg_doc_len': bm25.avgdl,
-                'doc_lens': bm25.doc_len,
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            # Dense embeddings (batched API calls, bounded number of batches in flight)
+            # run in the background while this thread does the CPU-side work
+            dense_future = executor.submit(
+                embedding_service.batch_generate_dense_embeddings, chunk_texts, "retrieval_document"
+            )
+            
+            # Sparse embeddings: tokenization is a few ms per thousand chunks, so it
+            # runs serially; extra threads only contend for the GIL
+            logger.debug("Generating sparse embeddings")
+            # One pass: each chunk's sparse vector is built while its tokens are hot
+            tokenized_chunks = []
+            sparse_embeddings = []
+            for text in chunk_texts:
+                tokens = preprocess_text(text)
+                tokenized_chunks.append(tokens)
+                sparse_embeddings.append(embedding_service.generate_sparse_embedding(tokens))
+            
+            dense_embeddings = dense_future.result()
+        
+        # BM25 corpus stats (only lengths are stored, so no BM25 index is built);
+        # kept out of structured_data, which extract_details writes concurrently
+        update = {}
+        doc_lens = [len(tokens) for tokens in tokenized_chunks]
+        if any(doc_lens):
+            update['bm25_corpus'] = {
+                'avg_doc_len': sum(doc_lens) / len(doc_lens),
+                'doc_lens': doc_lens,
             }
         
         # Combine embeddings
@@ -408,14 +567,14 @@ def generate_hybrid_embeddings(state: TenderIngestionState) -> TenderIngestionSt
                 'tokens': tokens
             })
         
-        state['hybrid_embeddings'] = hybrid_embeddings
+        update['hybrid_embeddings'] = hybrid_embeddings
         logger.info(f"Generated {len(hybrid_embeddings)} hybrid embeddings")
+        return update
         
     except Exception as e:
-        state['error'] = f"Embedding error: {str(e)}"
-        logger.error(state['error'])
-    
-    return state
+        error = f"Embedding error: {str(e)}"
+        logger.error(error)
+        return {"error": error}
 
 
 def store_in_database(state: TenderIngestionState) -> TenderIngestionState:
@@ -434,38 +593,42 @@ def store_in_database(state: TenderIngestionState) -> TenderIngestionState:
             tender_number=state.get('tender_number', 'N/A'),
             tender_date=data.get('tender_date'),
             submission_deadline=data.get('submission_deadline'),
-            tender_status=data.get('tender_status', 'Open'),
-            tender_value=data.get('tender_value', 0.0)
-        )
-        tender_id = project_repo.create(project)
-        state['tender_id'] = tender_id
-        
-        # Create file
-        file = TenderFile(
-            tender_id=tender_id,
-            file_name=data.get('file_name', 'Untitled'),
-            file_path=state['file_url'],
-            file_type='pdf',
-            bm25_corpus=data.get('bm25_corpus', {})
+            tender_status=data.get('tender_status', TenderStatus.OPEN),
+            tender_value_cents=data.get('tender_value_cents', 0)
         )
-        tender_file_id = file_repo.create(file)
-        state['tender_file_id'] = tender_file_id
         
-        # Create chunks
-        db_chunks = []
-        for chunk, hybrid_emb in zip(state.get('chunks', []), state.get('hybrid_embeddings', [])):
-            db_chunk = TenderChunk(
-                tender_file_id=tender_file_id,
-                chunk_index=chunk['chunk_index'],
-                chunk_text=chunk['text'],
-                chunk_metadata=chunk['metadata'],
-                dense_embedding=hybrid_emb.get('dense', []),
-                sparse_embedding=hybrid_emb.get('sparse', {}),
-                bm25_tokens=hybrid_emb.get('tokens', [])
+        # One transaction for the whole document: project upsert, file row and
+        # the chunk COPY commit together, or nothing is left behind on failure
+        with get_db_session() as db:
+            tender_id = project_repo.create(project, db=db)
+            state['tender_id'] = tender_id
+            
+            # Create file
+            file = TenderFile(
+                tender_id=tender_id,
+                file_name=data.get('file_name', 'Untitled'),
+                file_path=state['file_url'],
+                file_type='pdf',
+                bm25_corpus=state.get('bm25_corpus', {})
             )
-            db_chunks.append(db_chunk)
-        
-        chunk_repo.bulk_create(db_chunks)
+            tender_file_id = file_repo.create(file, db=db)
+            state['tender_file_id'] = tender_file_id
+            
+            # Create chunks
+            db_chunks = []
+            for chunk, hybrid_emb in zip(state.get('chunks', []), state.get('hybrid_embeddings', [])):
+                db_chunk = TenderChunk(
+                    tender_file_id=tender_file_id,
+                    chunk_index=chunk['chunk_index'],
+                    chunk_text=chunk['text'],
+                    chunk_metadata=chunk['metadata'],
+                    dense_embedding=hybrid_emb.get('dense', []),
+                    sparse_embedding=hybrid_emb.get('sparse', {}),
+                    bm25_tokens=hybrid_emb.get('tokens', [])
+                )
+                db_chunks.append(db_chunk)
+            
+            chunk_repo.bulk_create(db_chunks, db=db)
         
         state['db_status'] = f"Success: File ID {tender_file_id}, {len(db_chunks)} chunks"
         logger.info(f"✓ Successfully stored data: File ID {tender_file_id}, {len(db_chunks)} chunks")
@@ -490,11 +653,14 @@ workflow.add_node("chunk_document", chunk_document)
 workflow.add_node("generate_embeddings", generate_hybrid_embeddings)
 workflow.add_node("store_in_db", store_in_database)
 
+# Chunking is fast and needs only raw_text; after it the LLM details extraction
+# and the embedding calls are independent, so they run as parallel branches
+# and store_in_db waits for both
 workflow.set_entry_point("fetch_pdf")
-workflow.add_edge("fetch_pdf", "extract_details")
-workflow.add_edge("extract_details", "chunk_document")
+workflow.add_edge("fetch_pdf", "chunk_document")
+workflow.add_edge("chunk_document", "extract_details")
 workflow.add_edge("chunk_document", "generate_embeddings")
-workflow.add_edge("generate_embeddings", "store_in_db")
+workflow.add_edge(["extract_details", "generate_embeddings"], "store_in_db")
 workflow.add_edge("store_in_db", END)
 
 ingestion_app = workflow.compile()
@@ -20,8 +20,9 @@ class TenderIngestionState(TypedDict):
     
     chunks: List[Dict[str, Any]]
     dense_embeddings: List[List[float]]
-    sparse_embeddings: List[Dict[str, int]]
+    sparse_embeddings: List[Dict[int, int]]
     hybrid_embeddings: List[Dict[str, Any]]
+    bm25_corpus: Dict[str, Any]
     db_status: str
     error: str
 